@@ -34,8 +34,12 @@ class SegFlow:
         - membrane: Optional numpy array for the membrane channel. If not provided, the nuclear channel will be duplicated.
         """
         if membrane is None:
-            membrane = nuclear.copy()
-        self.image = np.stack([nuclear, membrane], axis=-1)
+            membrane = nuclear
+
+        # Copy both channels straight into one preallocated (height, width, 2) buffer
+        self.image = np.empty(nuclear.shape + (2,), dtype=np.result_type(nuclear, membrane))
+        self.image[..., 0] = nuclear
+        self.image[..., 1] = membrane
         print(f"Loaded numpy arrays with shape: {self.image.shape}")
 
     def normalize_image(self):
@@ -43,13 +47,14 @@ class SegFlow:
         Normalize each channel of the loaded image separately to have zero mean and unit variance.
         """
         if self.image is not None and len(self.image.shape) == 3:
-            normalized_image = np.zeros_like(self.image, dtype=np.float32)
-            for channel in range(self.image.shape[-1]):
-                channel_data = self.image[:, :, channel]
-                channel_mean = np.mean(channel_data)
-                channel_std = np.std(channel_data)
-                normalized_image[:, :, channel] = (channel_data - channel_mean) / channel_std
-            self.image = normalized_image
+            # Cast once to float32 and normalize all channels together with per-channel statistics,
+            # updating the float buffer in place so no further full-size temporaries are allocated
+            image = self.image.astype(np.float32, copy=False)
+            channel_mean = image.mean(axis=(0, 1), keepdims=True)
+            channel_std = image.std(axis=(0, 1), keepdims=True)
+            image -= channel_mean
+            image /= channel_std
+            self.image = image
             print("Normalized image shape:", self.image.shape)
 
     def extract_raw_tiles(self):
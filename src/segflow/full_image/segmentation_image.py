@@ -1,10 +1,7 @@
 import numpy as np
 from skimage.segmentation import expand_labels
 from skimage.morphology import binary_dilation, binary_erosion, disk
-from scipy.ndimage import binary_erosion as nd_binary_erosion
-from skimage.measure import regionprops
-from tqdm import tqdm
-import hashlib
+from skimage.measure import regionprops_table
 import cv2
 
 from scipy.ndimage import distance_transform_edt
@@ -14,10 +11,84 @@ import numpy as np
 from scipy.ndimage import distance_transform_edt
 from skimage.segmentation import expand_labels
 
-from scipy.ndimage import minimum_filter, maximum_filter
+from scipy.ndimage import minimum_filter, maximum_filter, minimum_filter1d, maximum_filter1d
 
 from skimage.segmentation import expand_labels
 
+from scipy.ndimage import find_objects
+from scipy.fft import rfft2, irfft2, next_fast_len
+
+from collections.abc import Mapping
+from functools import lru_cache
+from warnings import warn
+import weakref
+from multiprocessing import Pool, cpu_count
+
+# Region properties calculated (and cached) for every label of a SegmentationImage
+REGION_PROPERTIES = (
+    'label', 'centroid', 'major_axis_length', 'minor_axis_length',
+    'eccentricity', 'solidity', 'extent', 'orientation'
+)
+
+# Radius from which binary_dilation_fast/binary_erosion_fast count the disk's pixels with an FFT
+# convolution, whose cost does not grow with the radius, instead of scanning it with OpenCV
+FFT_MORPHOLOGY_MIN_RADIUS = 50
+
+# Largest structuring element (in pixels) for which the FFT counts are computed in float32: the
+# rounding error grows with the count, to about 0.05 at this size, well below the 0.5 threshold
+FFT_FLOAT32_MAX_COUNT = 2 ** 17
+
+# Cached attributes of a SegmentationImage, inherited by views of it
+CACHED_ATTRIBUTES = (
+    '_centroids_cache', '_area_cache', '_minor_axis_length_cache', '_major_axis_length_cache',
+    '_extent_cache', '_solidity_cache', '_eccentricity_cache', '_orientation_cache',
+    '_properties_table', '_segment_patches_cache', '_labels_cache',
+    '_properties_version', '_labels_version'
+)
+
+
+class RegionPropertyMapping(Mapping):
+    """
+    Read-only mapping from region label to one region property, backed by aligned NumPy arrays
+    instead of a Python dict. Labels are kept sorted so lookups are a binary search.
+    """
+    def __init__(self, labels, values):
+        """
+        Parameters:
+        - labels: Sorted 1D numpy array of region labels.
+        - values: Numpy array of property values aligned with labels along its first axis.
+        """
+        self._labels = labels
+        self._values = values
+
+    def __getitem__(self, label):
+        index = np.searchsorted(self._labels, label)
+        if index == self._labels.size or self._labels[index] != label:
+            raise KeyError(label)
+        value = self._values[index]
+        # Return plain Python values, with multi-valued properties (e.g. centroids) as tuples
+        return tuple(value.tolist()) if value.ndim else value.item()
+
+    def __iter__(self):
+        return iter(self._labels.tolist())
+
+    def keys(self):
+        return self._labels.tolist()
+
+    def values(self):
+        # Convert all values at once instead of one binary search per key
+        values = self._values.tolist()
+        return [tuple(value) for value in values] if self._values.ndim > 1 else values
+
+    def items(self):
+        return list(zip(self.keys(), self.values()))
+
+    def __len__(self):
+        return self._labels.size
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
 
 class SegmentationImage(np.ndarray):
     def __new__(cls, input_array):
@@ -44,8 +115,13 @@ class SegmentationImage(np.ndarray):
         obj._solidity_cache = None
         obj._eccentricity_cache = None
         obj._orientation_cache = None
+        obj._properties_table = None
         obj._segment_patches_cache = None
-        obj._checksum = obj._calculate_checksum()
+        obj._labels_cache = None
+        obj._labels_version = None
+        # Modification counter, shared with every array derived from this one
+        obj._version = [0]
+        obj._properties_version = None
         return obj
 
     def __init__(self, input_array):
@@ -56,6 +132,52 @@ class SegmentationImage(np.ndarray):
         """
         pass  # We are not adding any extra attributes at this point
 
+    def __array_finalize__(self, obj):
+        """
+        Set up the cache attributes of arrays numpy derives from an existing array (views,
+        slices, copies, results of ufuncs) without going through __new__.
+
+        Views of a SegmentationImage (arrays sharing its buffer) inherit its caches and share its
+        modification counter, so an identity view (e.g. from view() or astype(copy=False)) reuses
+        the calculated properties, and writes through any view invalidate them for all. The caches
+        are only used while the view still has the layout they were calculated for (see _cache_key),
+        so slices and transposes recalculate them. Arrays with their own buffer (copies, results
+        of ufuncs or fancy indexing) start with empty caches and their own counter.
+        """
+        is_view = isinstance(obj, SegmentationImage) and _buffer_owner(self) is _buffer_owner(obj)
+        for attribute in CACHED_ATTRIBUTES:
+            setattr(self, attribute, getattr(obj, attribute, None) if is_view else None)
+        self._version = obj._version if is_view else [0]
+
+    def _cache_key(self):
+        """
+        Identify the current state of the array: its modification count, the array owning its
+        buffer, and its layout within that buffer. The owner is held through a weak reference:
+        it is often the array itself, and a strong reference stored on it would form a cycle that
+        keeps the image alive until the garbage collector runs.
+
+        Returns:
+        - tuple: Key stored with the caches and compared with _is_cache_current before they are reused.
+        """
+        return (weakref.ref(_buffer_owner(self)), self._version[0], self.__array_interface__['data'][0], self.shape, self.strides, self.dtype)
+
+    def _is_cache_current(self, cache_key):
+        """
+        Check if caches stored with cache_key were calculated for the current state of the array.
+
+        Parameters:
+        - cache_key: Key returned by _cache_key when the caches were calculated, or None.
+
+        Returns:
+        - bool: True if the caches can be reused, otherwise False.
+        """
+        if cache_key is None:
+            return False
+        current_key = self._cache_key()
+        # The owner is compared by identity; a dead reference never matches, so a buffer freed and
+        # reused for different data at the same address is not mistaken for the original one
+        return cache_key[0]() is current_key[0]() and cache_key[1:] == current_key[1:]
+
     def _initialize_attributes(self, source_image):
         """
         Copy attributes from the source image to the new instance.
@@ -63,16 +185,12 @@ class SegmentationImage(np.ndarray):
         # Set any attributes from source_image here
         pass
 
-    def _calculate_checksum(self):
-        """
-        Calculate a checksum for the current state of the array to track modifications.
-        """
-        return hashlib.md5(np.ascontiguousarray(self.view(np.ndarray))).hexdigest()
-
     def _invalidate_cache(self):
         """
         Invalidate the cached centroids if the array has been modified.
         """
+        # Bump the modification counter so caches calculated for an older state are never reused
+        self._version[0] += 1
         self._centroids_cache = None
         self._area_cache = None
         self._minor_axis_length_cache = None
@@ -81,6 +199,47 @@ class SegmentationImage(np.ndarray):
         self._solidity_cache = None
         self._eccentricity_cache = None
         self._orientation_cache = None
+        self._properties_table = None
+        self._labels_cache = None
+
+    def _is_binary(self):
+        """
+        Check if the SegmentationImage is a binary segmentation: a boolean array, or an integer array
+        made of exactly the values 0 and 1. Checked with a min and a max reduction rather than a sort.
+
+        Returns:
+        - bool: True if the image is binary, otherwise False.
+        """
+        if self.dtype == np.bool_:
+            return True
+        return self.size > 0 and self.min() == 0 and self.max() == 1
+
+    def _binary_as_uint8(self):
+        """
+        Get a binary SegmentationImage as a uint8 array of 0 and 1 in the format expected by OpenCV.
+        Boolean and uint8 images are returned as views; other integer images are converted in one pass.
+
+        Returns:
+        - Numpy array of type uint8.
+        """
+        image = self.view(np.ndarray)
+        if image.dtype == np.bool_:
+            return image.view(np.uint8)
+        return image.astype(np.uint8, copy=False)
+
+    def _binary_from_uint8(self, image):
+        """
+        Convert a uint8 array of 0 and 1 returned by OpenCV back to the dtype of the SegmentationImage.
+
+        Parameters:
+        - image: Numpy array of type uint8 with values 0 or 1.
+
+        Returns:
+        - Numpy array with the dtype of the SegmentationImage (a view for boolean and uint8 images).
+        """
+        if self.dtype == np.bool_:
+            return image.view(np.bool_)
+        return image.astype(self.dtype, copy=False)
 
     def __setitem__(self, key, value):
         """
@@ -89,98 +248,109 @@ class SegmentationImage(np.ndarray):
         super(SegmentationImage, self).__setitem__(key, value)
         self._invalidate_cache()
 
+    @property
+    def labels(self):
+        """
+        Sorted unique labels in the SegmentationImage, background included if present, like np.unique(self).
+        Calculated once per modification of the array and shared by every method that needs the labels.
+        """
+        if self._labels_cache is None or not self._is_cache_current(self._labels_version):
+            self._calculate_labels()
+        return self._labels_cache
+
     @property
     def centroids(self):
-        if self._centroids_cache is None:
+        if self._centroids_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_centroids()
         return self._centroids_cache
 
     @property
     def area(self):
-        if self._area_cache is None:
+        if self._area_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_area()
         return self._area_cache
 
     @property
     def minor_axis_length(self):
-        if self._minor_axis_length_cache is None:
+        if self._minor_axis_length_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_minor_axis_length()
         return self._minor_axis_length_cache
 
     @property
     def major_axis_length(self):
-        if self._major_axis_length_cache is None:
+        if self._major_axis_length_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_major_axis_length()
         return self._major_axis_length_cache
 
     @property
     def extent(self):
-        if self._extent_cache is None:
+        if self._extent_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_extent()
         return self._extent_cache
 
     @property
     def solidity(self):
-        if self._solidity_cache is None:
+        if self._solidity_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_solidity()
         return self._solidity_cache
 
     @property
     def eccentricity(self):
-        if self._eccentricity_cache is None:
+        if self._eccentricity_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_eccentricity()
         return self._eccentricity_cache
 
     @property
     def orientation(self):
-        if self._orientation_cache is None:
+        if self._orientation_cache is None or not self._is_cache_current(self._properties_version):
             self._calculate_orientation()
         return self._orientation_cache
 
     def has_missing_cells(self):
         """
-        Check if any labels in the SegmentationImage have no associated pixels.
+        Check if any labels in the SegmentationImage have no associated pixels, i.e. whether
+        the label numbering 1..max_label has gaps.
 
         Returns:
         - bool: True if any labels are missing (i.e., have no pixels), otherwise False.
         """
-        # Get all unique labels in the segmentation image
-        labels = np.unique(self)
-        
-        # Check each label (except for background label 0) for missing pixels
-        for label in labels:
-            if label == 0:
-                continue  # Skip the background label
-            if np.sum(self == label) == 0:
-                return True  # Missing cell found
-
-        return False  # No missing cells
+        # Labels 1..max_label are all present exactly when there are max_label non-zero labels
+        non_zero_labels = self.labels[self.labels > 0]
+        return bool(non_zero_labels.size and non_zero_labels.size != non_zero_labels[-1])
 
-    def randomize_segmentation(self, seed=1):
+    def randomize_segmentation(self, seed=1, in_place=False):
         """
         Randomize cell labels in the segmentation mask for better visualization.
 
         Parameters:
         - seed: Random seed for reproducibility.
+        - in_place: If True, remap the labels of this instance row by row instead of allocating a new image.
         
         Returns:
         - SegmentationImage instance with randomized labels.
         """
         # Identify unique non-zero labels
-        unique_labels = np.unique(self)
+        unique_labels = self.labels
         non_zero_labels = unique_labels[unique_labels > 0]
 
         # Create a random permutation of the non-zero labels
         rng = np.random.default_rng(seed=seed)
         randomized_labels = rng.permutation(len(non_zero_labels)) + 1  # Start labels from 1
 
-        # Create a mapping that retains zero (background)
-        label_mapping = np.zeros(unique_labels.max() + 1, dtype=np.int32)
+        # Create a mapping that retains zero (background), in the narrowest unsigned dtype that
+        # holds the new labels 1..n so the gather below moves as few bytes as possible
+        label_mapping = np.zeros(unique_labels.max() + 1, dtype=np.min_scalar_type(len(non_zero_labels)))
         label_mapping[non_zero_labels] = randomized_labels
 
-        # Apply the mapping to the segmentation image
-        new_image = self.copy()
-        new_image = label_mapping[self]
+        if in_place:
+            # Remap one row at a time so only a single row is ever allocated
+            for row in self.view(np.ndarray):
+                row[...] = label_mapping[row]
+            self._invalidate_cache()
+            return self
+
+        # Apply the mapping to the segmentation image (the gather allocates the new image)
+        new_image = label_mapping[self.view(np.ndarray)]
         
 
         new_instance = self.__class__(new_image)
@@ -200,19 +370,18 @@ class SegmentationImage(np.ndarray):
         if dilation_pixels < 1:
             raise ValueError("dilation_pixels must be at least 1")
 
-        new_image = self.copy()
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
             print("dilating a binary segmentation")
-            selem = disk(dilation_pixels)
-            dilated = binary_dilation(self, selem)
-            new_image = dilated.astype(self.dtype)
+            selem = cached_disk(dilation_pixels)
+            dilated = binary_dilation_packed(self, selem)
+            new_image = dilated.astype(self.dtype, copy=False)
         else:
             print("dilating a label segmentation")
             # Labeled segmentation
             # Use expand_labels from skimage.segmentation
             dilated = expand_labels(self, distance=dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
         
         new_instance = self.__class__(new_image)
        	new_instance._initialize_attributes(self)
@@ -231,64 +400,93 @@ class SegmentationImage(np.ndarray):
         if erosion_pixels < 1:
             raise ValueError("erosion_pixels must be at least 1")
 
-        new_image = self.copy()
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
-            selem = disk(erosion_pixels)
-            eroded = binary_erosion(self, selem)
-            new_image = eroded.astype(self.dtype)
+            selem = cached_disk(erosion_pixels)
+            eroded = binary_erosion_packed(self, selem)
+            new_image = eroded.astype(self.dtype, copy=False)
         else:
             # Labeled segmentation
-            # Erode each label individually to prevent label merging
-            labels = np.unique(self)
-            labels = labels[labels != 0]  # Exclude background
-            eroded = np.zeros_like(self)
-            selem = disk(erosion_pixels)
-            for label in labels:
-                mask = self == label
-                eroded_mask = nd_binary_erosion(mask, structure=selem)
-                eroded[eroded_mask] = label
-            new_image = eroded.astype(self.dtype)
+            # Erode all labels at once; labels never merge because a pixel only survives
+            # if its whole neighborhood (including beyond the image border) shares its label
+            eroded = erode_labels(self, erosion_pixels, footprint=cached_disk(erosion_pixels), mode='constant')
+            new_image = eroded.astype(self.dtype, copy=False)
 
         new_instance = self.__class__(new_image)
        	new_instance._initialize_attributes(self)
        	return new_instance  
 
-    def _calculate_centroids(self):
+    def _calculate_labels(self):
         """
-        Calculate the centroid of each labeled region in the segmentation image along with additional metadata.
-        Zero-labeled regions (background) are excluded.
+        Find the unique labels of the SegmentationImage and cache them.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the centroid coordinate,
+        - Numpy array of the sorted unique labels.
         """
-        # Check if cached centroids are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._centroids_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._centroids_cache
+        labels, _ = _label_pixel_counts(self.view(np.ndarray))
+        labels.flags.writeable = False
 
+        self._labels_cache = labels
+        self._labels_version = self._cache_key()
+        return self._labels_cache
 
-        centroids = {}
-        regions = regionprops(self)
+    def calculate_region_properties(self, num_workers=None):
+        """
+        Calculate and cache all region properties up front, splitting the labels across worker processes.
+        Useful on large images, where the properties are otherwise calculated on a single core the first
+        time one of them is accessed.
 
-        for region in tqdm(regions, desc="Calculating Centroids", unit="region"):
-            if region.label != 0:
-                centroid_y, centroid_x = region.centroid  # Centroid is in (y, x) format
-                centroid_y = int(round(centroid_y))
-                centroid_x = int(round(centroid_x))
+        Parameters:
+        - num_workers: Number of worker processes (defaults to the number of CPUs).
+        """
+        self._calculate_region_properties(num_workers if num_workers is not None else cpu_count())
 
+    def _calculate_region_properties(self, num_workers=1):
+        """
+        Calculate every cached region property with a single regionprops_table pass, so the label image
+        is only scanned once no matter which property is requested first.
+        Zero-labeled regions (background) are excluded.
 
-                # Store metadata
-                centroids[region.label] = (centroid_y, centroid_x)
+        Parameters:
+        - num_workers: Number of worker processes; 1 (default) calculates the properties in this process.
+        """
+        if num_workers > 1:
+            table = regionprops_table_parallel(self.view(np.ndarray), num_workers)
+        else:
+            table = regionprops_table(self.view(np.ndarray), properties=REGION_PROPERTIES)
+        labels = table['label']
+
+        # Centroids are stored rounded to integer (y, x) pixel coordinates
+        table['centroid'] = np.round(np.stack((table['centroid-0'], table['centroid-1']), axis=1)).astype(int)
+
+        # Pixel areas of every label come from one counting pass over the image
+        present_labels, pixel_counts = _label_pixel_counts(self.view(np.ndarray))
+        table['area'] = pixel_counts[np.searchsorted(present_labels, labels)]
+
+        # Every cache is a label-indexed view onto the same table of aligned arrays
+        self._properties_table = table
+        self._centroids_cache = RegionPropertyMapping(labels, table['centroid'])
+        self._area_cache = RegionPropertyMapping(labels, table['area'])
+        self._major_axis_length_cache = RegionPropertyMapping(labels, table['major_axis_length'])
+        self._minor_axis_length_cache = RegionPropertyMapping(labels, table['minor_axis_length'])
+        self._eccentricity_cache = RegionPropertyMapping(labels, table['eccentricity'])
+        self._solidity_cache = RegionPropertyMapping(labels, table['solidity'])
+        self._extent_cache = RegionPropertyMapping(labels, table['extent'])
+        self._orientation_cache = RegionPropertyMapping(labels, table['orientation'])
+
+        # Record the version of the array the caches were calculated for
+        self._properties_version = self._cache_key()
 
-        # Cache the centroids and update the checksum and bbox_size
-        self._centroids_cache = centroids
-        self._checksum = current_checksum
+    def _calculate_centroids(self):
+        """
+        Calculate the centroid of each labeled region in the segmentation image along with additional metadata.
+        Zero-labeled regions (background) are excluded.
 
-        return centroids
+        Returns:
+        - A mapping where keys are labels (excluding zero) and values are the centroid coordinate,
+        """
+        self._calculate_region_properties()
+        return self._centroids_cache
 
     def _calculate_area(self):
         """
@@ -296,33 +494,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the area,
+        - A mapping where keys are labels (excluding zero) and values are the area,
         """
-        # Check if cached areas are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._area_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._area_cache
-
-
-        area = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating Area", unit="region"):
-            if region.label != 0:
-                # sum the number of pixels with the current label to get the area
-                curr_area = region.area
-
-                # Store metadata
-                area[region.label] = curr_area
-
-        # Cache the area and update the checksum and bbox_size
-        self._area_cache = area
-        self._checksum = current_checksum
-
-        return area
+        self._calculate_region_properties()
+        return self._area_cache
 
     def _calculate_major_axis_length(self):
         """
@@ -330,33 +505,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the MajorAxisLength,
+        - A mapping where keys are labels (excluding zero) and values are the MajorAxisLength,
         """
-        # Check if cached MajorAxisLengths are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._major_axis_length_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._major_axis_length_cache
-
-
-        major_axis_length = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating MajorAxisLength", unit="region"):
-            if region.label != 0:
-                # Get the major_axis_length property
-                curr_major_axis_length = region.major_axis_length
-
-                # Store metadata
-                major_axis_length[region.label] = curr_major_axis_length
-
-        # Cache the MajorAxisLength and update the checksum and bbox_size
-        self._major_axis_length_cache = major_axis_length
-        self._checksum = current_checksum
-
-        return major_axis_length
+        self._calculate_region_properties()
+        return self._major_axis_length_cache
 
     def _calculate_minor_axis_length(self):
         """
@@ -364,33 +516,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the MinorAxisLength,
+        - A mapping where keys are labels (excluding zero) and values are the MinorAxisLength,
         """
-        # Check if cached MinorAxisLengths are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._minor_axis_length_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._minor_axis_length_cache
-
-
-        minor_axis_length = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating MinorAxisLength", unit="region"):
-            if region.label != 0:
-                # Get the minor_axis_length property
-                curr_minor_axis_length = region.minor_axis_length
-
-                # Store metadata
-                minor_axis_length[region.label] = curr_minor_axis_length
-
-        # Cache the MinorAxisLength and update the checksum and bbox_size
-        self._minor_axis_length_cache = minor_axis_length
-        self._checksum = current_checksum
-
-        return minor_axis_length
+        self._calculate_region_properties()
+        return self._minor_axis_length_cache
 
     def _calculate_eccentricity(self):
         """
@@ -398,33 +527,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the Eccentricity,
+        - A mapping where keys are labels (excluding zero) and values are the Eccentricity,
         """
-        # Check if cached Eccentricities are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._eccentricity_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._eccentricity_cache
-
-
-        eccentricity = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating Eccentricity", unit="region"):
-            if region.label != 0:
-                # Get the eccentricity property
-                curr_eccentricity = region.eccentricity
-
-                # Store metadata
-                eccentricity[region.label] = curr_eccentricity
-
-        # Cache the Eccentricity and update the checksum and bbox_size
-        self._eccentricity_cache = eccentricity
-        self._checksum = current_checksum
-
-        return eccentricity
+        self._calculate_region_properties()
+        return self._eccentricity_cache
 
     def _calculate_solidity(self):
         """
@@ -432,33 +538,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the Solidity,
+        - A mapping where keys are labels (excluding zero) and values are the Solidity,
         """
-        # Check if cached Solidities are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._solidity_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._solidity_cache
-
-
-        solidity = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating Solidity", unit="region"):
-            if region.label != 0:
-                # Get the solidity property
-                curr_solidity = region.solidity
-
-                # Store metadata
-                solidity[region.label] = curr_solidity
-
-        # Cache the Solidity and update the checksum and bbox_size
-        self._solidity_cache = solidity
-        self._checksum = current_checksum
-
-        return solidity
+        self._calculate_region_properties()
+        return self._solidity_cache
 
     def _calculate_extent(self):
         """
@@ -466,33 +549,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the Extent,
+        - A mapping where keys are labels (excluding zero) and values are the Extent,
         """
-        # Check if cached Extents are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._extent_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._extent_cache
-
-
-        extent = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating Extent", unit="region"):
-            if region.label != 0:
-                # Get the extent property
-                curr_extent = region.extent
-
-                # Store metadata
-                extent[region.label] = curr_extent
-
-        # Cache the Extent and update the checksum and bbox_size
-        self._extent_cache = extent
-        self._checksum = current_checksum
-
-        return extent
+        self._calculate_region_properties()
+        return self._extent_cache
 
     def _calculate_orientation(self):
         """
@@ -500,33 +560,10 @@ class SegmentationImage(np.ndarray):
         Zero-labeled regions (background) are excluded.
 
         Returns:
-        - A dictionary where keys are labels (excluding zero) and values are the Orientation,
+        - A mapping where keys are labels (excluding zero) and values are the Orientation,
         """
-        # Check if cached Orientations are valid
-        current_checksum = self._calculate_checksum()
-        if (
-            self._orientation_cache is not None and
-            current_checksum == self._checksum
-        ):
-            return self._orientation_cache
-
-
-        orientation = {}
-        regions = regionprops(self)
-
-        for region in tqdm(regions, desc="Calculating Orientation", unit="region"):
-            if region.label != 0:
-                # Get the orientation property
-                curr_orientation = region.orientation
-
-                # Store metadata
-                orientation[region.label] = curr_orientation
-
-        # Cache the Orientation and update the checksum and bbox_size
-        self._orientation_cache = orientation
-        self._checksum = current_checksum
-
-        return orientation
+        self._calculate_region_properties()
+        return self._orientation_cache
 
     def apply_binary_mask(self, binary_mask, method):
         """
@@ -543,47 +580,44 @@ class SegmentationImage(np.ndarray):
             raise TypeError("binary_mask must be a SegmentationImage instance.")
         
         # Treat the binary mask where > 0 is True and 0 is False.
-        if not np.array_equal(np.unique(binary_mask), [0, 1]) and not np.issubdtype(binary_mask.dtype, np.bool_):
+        if not binary_mask._is_binary():
             warn("Binary mask contains values other than 0 and 1. Treating all non-zero values as True.")
         
         # Convert binary mask to boolean
-        binary_mask_bool = binary_mask > 0
-        new_image = self.copy()
+        binary_mask_bool = np.asarray(binary_mask > 0)
+
+        # Labels index a lookup table of which labels to keep (boolean images are indexed as 0/1)
+        labels = self.view(np.ndarray)
+        label_indices = labels.view(np.uint8) if labels.dtype == np.bool_ else labels
+        max_label = int(label_indices.max()) if label_indices.size else 0
         
         if method == 'centroid_overlap':
             # Get the centroids of the labeled regions in segmentation_image
             centroids = self.centroids
             if centroids is None:
                 raise ValueError("centroid_overlap requires execution of calculate_centroids() prior to applying the mask.")
-            # Convert centroid coordinates to integer indices for lookup
-            centroids_in_false_areas = [
-                label for label, centroid in centroids.items()
-                if not binary_mask_bool[int(centroid[0]), int(centroid[1])]
-            ]
-            
-            # Set the regions with centroids in false areas to zero
-            mask = np.isin(self, centroids_in_false_areas)
-            new_image[mask] = 0
+            # Keep only labels whose centroid falls in a True area of the mask
+            keep = np.ones(max_label + 1, dtype=bool)
+            if centroids:
+                centroid_labels = np.fromiter(centroids.keys(), dtype=np.intp, count=len(centroids))
+                centroid_coords = np.array(list(centroids.values()), dtype=np.intp)
+                keep[centroid_labels] = binary_mask_bool[centroid_coords[:, 0], centroid_coords[:, 1]]
             
         elif method == 'all_in':
-            # Use logical indexing to find labels in the False area
-            labels_in_false_area = np.unique(self[~binary_mask_bool])
-            # Zero out corresponding labels
-            mask = np.isin(self, labels_in_false_area)
-            new_image[mask] = 0
+            # Zero out every label that has any pixel in the False area
+            keep = np.ones(max_label + 1, dtype=bool)
+            keep[label_indices[~binary_mask_bool]] = False
 
         elif method == 'any_in':
-            # Get all labels that appear in the True areas of the binary mask
-            labels_in_true_area = np.unique(self[binary_mask_bool])
-            all_labels = np.unique(self)
-            # Labels to zero are those not in labels_in_true_area and not background (0)
-            labels_to_zero = np.setdiff1d(all_labels, labels_in_true_area)
-            # Zero out those labels
-            mask = np.isin(self, labels_to_zero)
-            new_image[mask] = 0
+            # Keep only labels that appear in the True areas of the binary mask
+            keep = np.zeros(max_label + 1, dtype=bool)
+            keep[label_indices[binary_mask_bool]] = True
                     
         else:
             raise ValueError(f"Invalid method '{method}'. Choose from 'centroid_overlap', 'all_in', 'any_in'.")
+
+        # Set the pixels of every label that is not kept to zero in one gather through the lookup table
+        new_image = np.where(keep[label_indices], labels, np.zeros((), dtype=labels.dtype))
         
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
@@ -605,14 +639,14 @@ class SegmentationImage(np.ndarray):
         if dilation_pixels < 1:
             raise ValueError("dilation_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
             dilated = binary_dilation_fast(self, dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
         else:
             # Labeled segmentation
             dilated = dilate_labels(self, dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
 
     
         new_instance = self.__class__(new_image)
@@ -632,14 +666,14 @@ class SegmentationImage(np.ndarray):
         if erosion_pixels < 1:
             raise ValueError("erosion_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
             eroded = binary_erosion_fast(self, erosion_pixels)
-            new_image = eroded.astype(self.dtype)
+            new_image = eroded.astype(self.dtype, copy=False)
         else:
             # Labeled segmentation
             eroded = erode_labels(self, erosion_pixels)
-            new_image = eroded.astype(self.dtype)
+            new_image = eroded.astype(self.dtype, copy=False)
 
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
@@ -658,16 +692,16 @@ class SegmentationImage(np.ndarray):
         if dilation_pixels < 1:
             raise ValueError("dilation_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
             dilated = binary_dilation_fast(self, dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
         else:
             # Labeled segmentation
             # Use expand_labels from skimage.segmentation
             from skimage.segmentation import expand_labels
             dilated = expand_labels(self, distance=dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
         
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
@@ -686,21 +720,16 @@ class SegmentationImage(np.ndarray):
         if erosion_pixels < 1:
             raise ValueError("erosion_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
             eroded = binary_erosion_fast(self, erosion_pixels)
-            new_image = eroded.astype(self.dtype)
+            new_image = eroded.astype(self.dtype, copy=False)
         else:
             # Labeled segmentation
-            # Erode each label individually to prevent label merging
-            labels = np.unique(self)
-            labels = labels[labels != 0]  # Exclude background
-            eroded = np.zeros_like(self)
-            for label in labels:
-                mask = self == label
-                eroded_mask = binary_erosion_fast(mask, erosion_pixels)
-                eroded[eroded_mask] = label
-            new_image = eroded.astype(self.dtype)
+            # Erode all labels at once; labels never merge because a pixel only survives
+            # if its whole neighborhood shares its label
+            eroded = erode_labels(self, erosion_pixels)
+            new_image = eroded.astype(self.dtype, copy=False)
 
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
@@ -719,11 +748,11 @@ class SegmentationImage(np.ndarray):
         if closing_pixels < 1:
             raise ValueError("closing_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
-            image_uint8 = (self.astype(np.uint8) * 255)
-            closed = morphological_closing_fast(image_uint8, closing_pixels)
-            new_image = (closed > 0).astype(self.dtype)
+            # OpenCV treats any non-zero value as foreground, so the image stays 0/1 uint8 throughout
+            closed = morphological_closing_fast(self._binary_as_uint8(), closing_pixels)
+            new_image = self._binary_from_uint8(closed)
         else:
             # For labeled images, you might need a different approach
             # because morphological closing can merge labels.
@@ -747,19 +776,17 @@ class SegmentationImage(np.ndarray):
         if dilation_pixels < 1:
             raise ValueError("dilation_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
-            # Convert boolean image to uint8 format expected by OpenCV
-            image_uint8 = (self.astype(np.uint8) * 255)
-            dilated = binary_dilation_fast(image_uint8, dilation_pixels)
-            # Convert back to original format
-            new_image = (dilated > 0).astype(self.dtype)
+            # OpenCV treats any non-zero value as foreground, so the image stays 0/1 uint8 throughout
+            dilated = binary_dilation_fast(self._binary_as_uint8(), dilation_pixels)
+            new_image = self._binary_from_uint8(dilated)
         else:
             # Labeled segmentation
             # Use expand_labels from skimage.segmentation
             from skimage.segmentation import expand_labels
             dilated = expand_labels(self, distance=dilation_pixels)
-            new_image = dilated.astype(self.dtype)
+            new_image = dilated.astype(self.dtype, copy=False)
         
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
@@ -778,43 +805,154 @@ class SegmentationImage(np.ndarray):
         if erosion_pixels < 1:
             raise ValueError("erosion_pixels must be at least 1")
 
-        if self.dtype == np.bool_ or np.array_equal(np.unique(self), [0, 1]):
+        if self._is_binary():
             # Binary segmentation
-            # Convert boolean image to uint8 format expected by OpenCV
-            image_uint8 = (self.astype(np.uint8) * 255)
-            eroded = binary_erosion_fast(image_uint8, erosion_pixels)
-            # Convert back to original format
-            new_image = (eroded > 0).astype(self.dtype)
+            # OpenCV treats any non-zero value as foreground, so the image stays 0/1 uint8 throughout
+            eroded = binary_erosion_fast(self._binary_as_uint8(), erosion_pixels)
+            new_image = self._binary_from_uint8(eroded)
         else:
             # Labeled segmentation
-            # Erode each label individually to prevent label merging
-            labels = np.unique(self)
-            labels = labels[labels != 0]  # Exclude background
-            eroded = np.zeros_like(self)
-            for label in labels:
-                mask = (self == label).astype(np.uint8) * 255
-                eroded_mask = binary_erosion_fast(mask, erosion_pixels)
-                eroded[eroded_mask > 0] = label
-            new_image = eroded.astype(self.dtype)
+            # Erode all labels at once; labels never merge because a pixel only survives
+            # if its whole neighborhood shares its label
+            eroded = erode_labels(self, erosion_pixels)
+            new_image = eroded.astype(self.dtype, copy=False)
 
         new_instance = self.__class__(new_image)
         new_instance._initialize_attributes(self)
         return new_instance
 
 
+def _label_pixel_counts(image):
+    """
+    Find the labels of a labeled image and count their pixels. Non-negative labels below the
+    number of pixels are counted in one linear bincount pass instead of a sort; negative labels,
+    or large sparse ones (e.g. from a hashed or globally offset labeling) whose bincount would
+    need an entry for every value up to the largest label, fall back to np.unique.
+
+    Parameters:
+    - image: Labeled image (numpy array).
+
+    Returns:
+    - labels: Sorted unique labels, with the image's dtype.
+    - counts: Number of pixels of each label.
+    """
+    if image.size == 0 or image.min() < 0 or image.max() >= image.size:
+        return np.unique(image, return_counts=True)
+
+    counts = np.bincount(image.ravel().astype(np.intp, copy=False))
+    labels = np.flatnonzero(counts)
+    return labels.astype(image.dtype), counts[labels]
+
+
+def _buffer_owner(array):
+    """
+    Find the array that owns the memory an array views, following its chain of bases.
+
+    Parameters:
+    - array: Numpy array.
+
+    Returns:
+    - The last numpy array in the chain of bases (the array itself if it owns its data).
+    """
+    while isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+@lru_cache(maxsize=32)
+def cached_disk(radius):
+    """
+    Return skimage's disk structuring element of the given radius, built once per radius.
+    The array is shared between calls, so it is returned read-only.
+
+    Parameters:
+    - radius: Radius of the disk.
+
+    Returns:
+    - Read-only disk structuring element.
+    """
+    selem = disk(radius)
+    selem.flags.writeable = False
+    return selem
+
+
+@lru_cache(maxsize=32)
+def cached_ellipse(radius):
+    """
+    Return OpenCV's elliptical structuring element of size 2 * radius + 1, built once per radius.
+    The array is shared between calls, so it is returned read-only.
+
+    Parameters:
+    - radius: Radius of the structuring element.
+
+    Returns:
+    - Read-only elliptical structuring element.
+    """
+    kernel_size = 2 * radius + 1
+    selem = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    selem.flags.writeable = False
+    return selem
+
+
+@lru_cache(maxsize=32)
+def cached_square(radius):
+    """
+    Return a square structuring element of size 2 * radius + 1, built once per radius.
+    The array is shared between calls, so it is returned read-only.
+
+    Parameters:
+    - radius: Radius of the structuring element.
+
+    Returns:
+    - Read-only square structuring element.
+    """
+    kernel_size = 2 * radius + 1
+    selem = np.ones((kernel_size, kernel_size), dtype=np.uint8)
+    selem.flags.writeable = False
+    return selem
+
+
+@lru_cache(maxsize=32)
+def cached_octagon_lines(radius):
+    """
+    Return line structuring elements (horizontal, vertical and the two diagonals) whose successive
+    application is a dilation by an octagon approximating a disk of the given radius, built once per radius.
+    The arrays are shared between calls, so they are returned read-only.
+
+    Parameters:
+    - radius: Radius of the disk to approximate.
+
+    Returns:
+    - Tuple of read-only line structuring elements.
+    """
+    # The octagon reaches a + 2b pixels along the axes and sqrt(2) * (a + b) along the diagonals,
+    # both close to the radius when b is about (1 - 1/sqrt(2)) * radius
+    diagonal_half_length = int(round(radius * (1 - 1 / np.sqrt(2))))
+    axis_half_length = radius - 2 * diagonal_half_length
+
+    lines = (
+        np.ones((1, 2 * axis_half_length + 1), dtype=np.uint8),
+        np.ones((2 * axis_half_length + 1, 1), dtype=np.uint8),
+        np.eye(2 * diagonal_half_length + 1, dtype=np.uint8),
+        np.fliplr(np.eye(2 * diagonal_half_length + 1, dtype=np.uint8)).copy(),
+    )
+    for selem in lines:
+        selem.flags.writeable = False
+    return lines
+
+
 def morphological_closing_fast(image, closing_radius):
     """
     Perform morphological closing using OpenCV with a circular structuring element.
 
     Parameters:
-    - image: Binary input image (numpy array of type uint8 with values 0 or 255).
+    - image: Binary input image (numpy array of type uint8 with values 0 and 1, or 0 and 255).
     - closing_radius: Radius of the structuring element.
 
     Returns:
     - Image after morphological closing.
     """
-    kernel_size = 2 * closing_radius + 1
-    selem = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    selem = cached_ellipse(closing_radius)
 
     closed_image = cv2.morphologyEx(
         image, cv2.MORPH_CLOSE, selem, borderType=cv2.BORDER_REPLICATE
@@ -824,40 +962,62 @@ def morphological_closing_fast(image, closing_radius):
 
 
 
-def binary_dilation_fast(image, dilation_radius):
+def binary_dilation_fast(image, dilation_radius, approximate=False):
     """
     Perform binary dilation using OpenCV with a circular structuring element.
 
     Parameters:
-    - image: Binary input image (numpy array of type uint8 with values 0 or 255).
+    - image: Binary input image (numpy array of type uint8 with values 0 and 1, or 0 and 255).
     - dilation_radius: Radius of the structuring element.
+    - approximate: If True, dilate by an octagon approximating the disk, decomposed into four line
+      structuring elements, so the cost grows with the radius rather than its square.
+      Otherwise, from FFT_MORPHOLOGY_MIN_RADIUS the exact result is computed by binary_dilation_fft.
 
     Returns:
     - Dilated binary image.
     """
-    # Create a circular structuring element
-    kernel_size = 2 * dilation_radius + 1
-    selem = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    if approximate:
+        dilated_image = image
+        for selem in cached_octagon_lines(dilation_radius):
+            dilated_image = cv2.dilate(dilated_image, selem, iterations=1)
+        return dilated_image
+
+    if dilation_radius >= FFT_MORPHOLOGY_MIN_RADIUS:
+        return binary_dilation_fft(image, dilation_radius)
+
+    # Get the (cached) circular structuring element
+    selem = cached_ellipse(dilation_radius)
 
     # Perform dilation
     dilated_image = cv2.dilate(image, selem, iterations=1)
 
     return dilated_image
 
-def binary_erosion_fast(image, erosion_radius):
+def binary_erosion_fast(image, erosion_radius, approximate=False):
     """
     Perform binary erosion using OpenCV with a circular structuring element.
 
     Parameters:
-    - image: Binary input image (numpy array of type uint8 with values 0 or 255).
+    - image: Binary input image (numpy array of type uint8 with values 0 and 1, or 0 and 255).
     - erosion_radius: Radius of the structuring element.
+    - approximate: If True, erode by an octagon approximating the disk, decomposed into four line
+      structuring elements, so the cost grows with the radius rather than its square.
+      Otherwise, from FFT_MORPHOLOGY_MIN_RADIUS the exact result is computed by binary_erosion_fft.
 
     Returns:
     - Eroded binary image.
     """
-    # Create a circular structuring element
-    kernel_size = 2 * erosion_radius + 1
-    selem = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+    if approximate:
+        eroded_image = image
+        for selem in cached_octagon_lines(erosion_radius):
+            eroded_image = cv2.erode(eroded_image, selem, iterations=1)
+        return eroded_image
+
+    if erosion_radius >= FFT_MORPHOLOGY_MIN_RADIUS:
+        return binary_erosion_fft(image, erosion_radius)
+
+    # Get the (cached) circular structuring element
+    selem = cached_ellipse(erosion_radius)
 
     # Perform erosion
     eroded_image = cv2.erode(image, selem, iterations=1)
@@ -865,6 +1025,368 @@ def binary_erosion_fast(image, erosion_radius):
     return eroded_image
 
 
+def _count_under_selem(mask, selem, workers=None):
+    """
+    Count, with an FFT convolution, the pixels of a binary mask under a (symmetric) structuring
+    element centered on every pixel. The zero padding counts pixels outside the image as 0.
+    Up to FFT_FLOAT32_MAX_COUNT pixels under the structuring element, the FFT is computed in
+    float32, which halves its buffers; larger ones fall back to float64 so that the counts stay
+    well within 0.5 of the exact integers.
+
+    Parameters:
+    - mask: Binary mask.
+    - selem: Structuring element of odd size, symmetric under a 180 degree rotation.
+    - workers: Number of threads for scipy.fft (defaults to 1; -1 uses all CPUs).
+
+    Returns:
+    - Array of the mask's shape with the counts.
+    """
+    dtype = np.float32 if np.count_nonzero(selem) <= FFT_FLOAT32_MAX_COUNT else np.float64
+    fft_shape = [next_fast_len(size + kernel_size - 1, real=True)
+                 for size, kernel_size in zip(mask.shape, selem.shape)]
+    spectrum = rfft2(mask.astype(dtype), fft_shape, workers=workers)
+    spectrum *= rfft2(selem.astype(dtype), fft_shape, workers=workers)
+    counts = irfft2(spectrum, fft_shape, workers=workers)
+    del spectrum
+
+    # Keep the part centered on the image, like mode='same'
+    row_offset, column_offset = (selem.shape[0] - 1) // 2, (selem.shape[1] - 1) // 2
+    return counts[row_offset:row_offset + mask.shape[0], column_offset:column_offset + mask.shape[1]]
+
+
+def binary_dilation_fft(image, dilation_radius, workers=None):
+    """
+    Perform binary dilation with OpenCV's circular structuring element by counting, with an FFT
+    convolution, the foreground pixels under the structuring element around every pixel.
+    Gives the same result as binary_dilation_fast, faster for large radii.
+
+    Parameters:
+    - image: Binary input image (numpy array of type uint8 with values 0 and 1, or 0 and 255).
+    - dilation_radius: Radius of the structuring element.
+    - workers: Number of threads for scipy.fft (defaults to 1; -1 uses all CPUs).
+
+    Returns:
+    - Dilated binary image, with the foreground value of the input.
+    """
+    image = np.asarray(image)
+    selem = cached_ellipse(dilation_radius)
+
+    # A pixel is dilated if any foreground pixel falls under the structuring element
+    # (the zero padding of the convolution leaves pixels outside the image as background)
+    foreground_count = _count_under_selem(image > 0, selem, workers)
+    dilated = foreground_count > 0.5
+    return np.where(dilated, image.max(initial=0), 0).astype(image.dtype)
+
+
+def binary_erosion_fft(image, erosion_radius, workers=None):
+    """
+    Perform binary erosion with OpenCV's circular structuring element by counting, with an FFT
+    convolution, the background pixels under the structuring element around every pixel.
+    Gives the same result as binary_erosion_fast, faster for large radii.
+
+    Parameters:
+    - image: Binary input image (numpy array of type uint8 with values 0 and 1, or 0 and 255).
+    - erosion_radius: Radius of the structuring element.
+    - workers: Number of threads for scipy.fft (defaults to 1; -1 uses all CPUs).
+
+    Returns:
+    - Eroded binary image, with the foreground value of the input.
+    """
+    image = np.asarray(image)
+    selem = cached_ellipse(erosion_radius)
+
+    # A pixel survives if no background pixel falls under the structuring element (the zero
+    # padding of the convolution counts pixels outside the image as foreground, like cv2.erode)
+    background_count = _count_under_selem(image == 0, selem, workers)
+    eroded = background_count < 0.5
+    return np.where(eroded, image.max(initial=0), 0).astype(image.dtype)
+
+
+def _regionprops_table_packed(packed_regions, offsets):
+    """
+    Calculate REGION_PROPERTIES for the regions packed into an image by _pack_regions.
+
+    Parameters:
+    - packed_regions: Labeled image holding the bounding box crop of every region to measure.
+    - offsets: Array of shape (n_regions, 2), in label order, moving each region from its packed
+      position back to its position in the full image.
+
+    Returns:
+    - Dictionary of property arrays, as returned by regionprops_table, in full image coordinates.
+    """
+    table = regionprops_table(packed_regions, properties=REGION_PROPERTIES)
+    table['centroid-0'] = table['centroid-0'] + offsets[:, 0]
+    table['centroid-1'] = table['centroid-1'] + offsets[:, 1]
+    return table
+
+
+def _pack_regions(labels, region_labels, region_slices):
+    """
+    Copy the bounding box crops of some regions of a labeled image next to each other into a
+    small image, in rows of crops (tallest first), hiding the pixels of all other regions.
+    Each region keeps its own pixels, which are all that its properties depend on.
+
+    Parameters:
+    - labels: Labeled image (numpy array).
+    - region_labels: Sorted labels of the regions to pack.
+    - region_slices: Bounding box slices of the regions, as returned by find_objects.
+
+    Returns:
+    - packed_regions: Labeled image holding the crops.
+    - offsets: Array of shape (n_regions, 2), in the order of region_labels, from the packed
+      position of each crop to its position in labels.
+    """
+    heights = np.array([bbox[0].stop - bbox[0].start for bbox in region_slices])
+    widths = np.array([bbox[1].stop - bbox[1].start for bbox in region_slices])
+
+    # Rows of crops about as wide as a square holding all of them
+    row_width = max(int(widths.max()), int(np.sqrt(np.sum(heights * widths))))
+    positions = np.zeros((len(region_slices), 2), dtype=np.intp)
+    y = x = row_height = 0
+    for index in np.argsort(-heights, kind='stable'):
+        if x + widths[index] > row_width:
+            y += row_height
+            x = row_height = 0
+        positions[index] = (y, x)
+        x += widths[index]
+        row_height = max(row_height, heights[index])
+
+    packed_regions = np.zeros((y + row_height, row_width), dtype=labels.dtype)
+    for region_label, bbox, (y, x) in zip(region_labels, region_slices, positions):
+        crop = labels[bbox]
+        packed_crop = packed_regions[y:y + crop.shape[0], x:x + crop.shape[1]]
+        np.copyto(packed_crop, crop, where=crop == region_label)
+
+    starts = np.array([(bbox[0].start, bbox[1].start) for bbox in region_slices], dtype=np.intp)
+    return packed_regions, starts - positions
+
+
+def regionprops_table_parallel(labels, num_workers):
+    """
+    Calculate REGION_PROPERTIES of a labeled image with regionprops_table split over worker processes.
+    The labels are split into consecutive ranges, and each worker only receives the bounding box
+    crops of the regions in its range, packed into one small image.
+
+    Parameters:
+    - labels: Input labeled image (numpy array).
+    - num_workers: Number of worker processes.
+
+    Returns:
+    - Dictionary of property arrays, identical in layout to regionprops_table's.
+    """
+    # Bounding box of every label present in the image
+    bboxes = [(label, bbox) for label, bbox in enumerate(find_objects(labels), start=1) if bbox is not None]
+    if not bboxes:
+        return regionprops_table(labels, properties=REGION_PROPERTIES)
+    present_labels = np.array([label for label, _ in bboxes])
+    region_slices = [bbox for _, bbox in bboxes]
+
+    # One packed image per consecutive range of labels; its size follows the regions' bounding
+    # boxes, not where in the image they are, so it stays small whatever order the labels are in
+    args = []
+    for chunk in np.array_split(np.arange(present_labels.size), min(num_workers, present_labels.size)):
+        args.append(_pack_regions(labels, present_labels[chunk], [region_slices[index] for index in chunk]))
+
+    with Pool(num_workers) as pool:
+        tables = pool.starmap(_regionprops_table_packed, args)
+
+    # Chunks are in label order, so concatenating keeps the labels sorted
+    return {key: np.concatenate([table[key] for table in tables]) for key in tables[0]}
+
+
+def dilate_labels(labels, dilation_radius):
+    """
+    Dilate labeled image with an exact Euclidean distance transform, growing each label into the
+    background pixels within dilation_radius of it without overlapping other labels. Every pixel
+    takes the label of its exact nearest labeled pixel, so the result equals skimage's expand_labels.
+
+    Parameters:
+    - labels: Input labeled image (numpy array).
+    - dilation_radius: Radius for dilation (number of pixels).
+
+    Returns:
+    - Dilated labeled image.
+    """
+    labels = np.asarray(labels)
+    background = labels == 0
+
+    # Distance to, and coordinates of, the nearest labeled pixel for every pixel in the image
+    distances, (nearest_y, nearest_x) = distance_transform_edt(background, return_indices=True)
+
+    within_reach = background & (distances <= dilation_radius)
+    return np.where(within_reach, labels[nearest_y, nearest_x], labels)
+
+
+def erode_labels(labels, erosion_radius, footprint=None, mode='nearest'):
+    """
+    Erode every label of a labeled image at once with a grayscale minimum and maximum filter.
+    A pixel keeps its label only if every pixel under the structuring element has that same
+    label, which is exactly where the neighborhood minimum equals the neighborhood maximum.
+
+    Parameters:
+    - labels: Input labeled image (numpy array).
+    - erosion_radius: Radius of the structuring element.
+    - footprint: Optional boolean structuring element. Defaults to the OpenCV ellipse used by binary_erosion_fast.
+    - mode: Border handling passed to the filters. 'nearest' (default) leaves labels touching the image
+      border uneroded there, like OpenCV; 'constant' treats the outside as background and erodes them.
+
+    Returns:
+    - Eroded labeled image.
+    """
+    if footprint is None:
+        footprint = cached_ellipse(erosion_radius)
+    footprint = np.asarray(footprint, dtype=bool)
+    labels = np.asarray(labels)
+
+    # Neighborhood minimum and maximum labels under the structuring element
+    lowest = minimum_filter(labels, footprint=footprint, mode=mode, cval=0)
+    highest = maximum_filter(labels, footprint=footprint, mode=mode, cval=0)
+
+    return np.where((lowest == highest) & (labels != 0), labels, 0)
+
+
+def _shift_packed_columns(packed, shift):
+    """
+    Shift the columns of a bit-packed binary image, shifting in zeros.
+
+    Parameters:
+    - packed: (height, n_words) little-endian uint64 array, pixel column x stored in bit x % 64 of word x // 64.
+    - shift: Number of columns to shift by; positive moves pixels to higher columns (out[x] = in[x - shift]).
+
+    Returns:
+    - Shifted bit-packed image.
+    """
+    if shift == 0:
+        return packed
+    words, bits = divmod(abs(shift), 64)
+    n_words = packed.shape[1]
+    shifted = np.zeros_like(packed)
+    if words >= n_words:
+        return shifted
+
+    if shift > 0:
+        source = packed[:, :n_words - words]
+        shifted[:, words:] = source << np.uint64(bits)
+        if bits:
+            # Carry the bits pushed out of each word into the next one
+            shifted[:, words + 1:] |= source[:, :-1] >> np.uint64(64 - bits)
+    else:
+        source = packed[:, words:]
+        shifted[:, :n_words - words] = source >> np.uint64(bits)
+        if bits:
+            shifted[:, :n_words - words - 1] |= source[:, 1:] << np.uint64(64 - bits)
+    return shifted
+
+
+def _packed_horizontal_run(packed, half_width):
+    """
+    Dilate a bit-packed binary image along its rows by a centered run of 2 * half_width + 1 pixels.
+
+    Parameters:
+    - packed: Bit-packed binary image (see _shift_packed_columns).
+    - half_width: Number of pixels the run extends on each side of the center.
+
+    Returns:
+    - Bit-packed image where each pixel is the OR of its row neighbors within half_width.
+    """
+    def one_sided_run(direction):
+        # OR of the shifts 0..half_width in one direction, built by doubling the covered span
+        run, run_span = None, 0
+        block, block_span = packed, 1
+        remaining = half_width + 1
+        while remaining:
+            if remaining & 1:
+                run = block if run is None else run | _shift_packed_columns(block, direction * run_span)
+                run_span += block_span
+            remaining >>= 1
+            if remaining:
+                block = block | _shift_packed_columns(block, direction * block_span)
+                block_span *= 2
+        return run
+
+    return one_sided_run(1) | one_sided_run(-1)
+
+
+def binary_dilation_packed(image, footprint):
+    """
+    Perform binary dilation on a bit-packed copy of the image, so every operation works on 64 pixels
+    per machine word. The footprint is applied row by row: each footprint row is a horizontal run
+    computed with word-wise shifts, and the runs are ORed together with row offsets. Pixels outside
+    the image count as False, like scipy.ndimage.binary_dilation.
+
+    Parameters:
+    - image: Binary input image (boolean or 0/1).
+    - footprint: Structuring element whose rows are each a single run centered on the middle column (e.g. disk).
+
+    Returns:
+    - Dilated binary image (boolean).
+    """
+    height, width = image.shape
+    footprint = np.asarray(footprint, dtype=bool)
+    center_y, center_x = footprint.shape[0] // 2, footprint.shape[1] // 2
+
+    # Pack each row into little-endian 64-bit words, padding the row with False
+    n_words = -(-width // 64)
+    padded = np.zeros((height, n_words * 64), dtype=bool)
+    padded[:, :width] = image
+    packed = np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+    dilated = np.zeros_like(packed)
+    runs = {}
+    for footprint_y, footprint_row in enumerate(footprint):
+        dy = footprint_y - center_y
+        columns = np.flatnonzero(footprint_row)
+        if columns.size == 0 or abs(dy) >= height:
+            continue
+
+        # Horizontal runs are shared by all footprint rows of the same width
+        half_width = columns[-1] - center_x
+        if half_width not in runs:
+            runs[half_width] = _packed_horizontal_run(packed, half_width)
+        run = runs[half_width]
+
+        # dilated[y] |= run[y + dy]
+        if dy >= 0:
+            dilated[:height - dy] |= run[dy:]
+        else:
+            dilated[-dy:] |= run[:height + dy]
+
+    return np.unpackbits(dilated.view(np.uint8), axis=1, count=width, bitorder='little').astype(bool)
+
+
+def binary_erosion_packed(image, footprint):
+    """
+    Perform binary erosion on a bit-packed copy of the image as the complement of the packed dilation
+    of the complement. Pixels outside the image count as True, like skimage.morphology.binary_erosion.
+
+    Parameters:
+    - image: Binary input image (boolean or 0/1).
+    - footprint: Symmetric structuring element whose rows are each a single centered run (e.g. disk).
+
+    Returns:
+    - Eroded binary image (boolean).
+    """
+    return ~binary_dilation_packed(np.asarray(image) == 0, footprint)
+
+
+def _as_opencv_morphology_image(image):
+    """
+    Get an image as an array OpenCV's dilate and erode accept, without copying it.
+
+    Parameters:
+    - image: Input image (numpy array).
+
+    Returns:
+    - Numpy array viewing the image (boolean images as uint8), or None if OpenCV does not support the dtype.
+    """
+    image = np.asarray(image)
+    if image.dtype == np.bool_:
+        return image.view(np.uint8)
+    if image.dtype in (np.uint8, np.uint16, np.int16, np.float32, np.float64):
+        return image
+    return None
+
+
 def binary_dilation_fast3(image, dilation_radius):
     """
     Perform binary dilation on a large binary image efficiently.
@@ -878,9 +1400,18 @@ def binary_dilation_fast3(image, dilation_radius):
     """
     # Use a square structuring element with size based on the dilation radius
     size = 2 * dilation_radius + 1
-    # Perform the dilation using maximum_filter
-    dilated_image = maximum_filter(image, size=size, mode='constant')
-    return dilated_image.astype(image.dtype)
+    opencv_image = _as_opencv_morphology_image(image)
+    if opencv_image is not None:
+        # OpenCV runs a square kernel as separable row and column passes with SIMD
+        dilated_image = cv2.dilate(
+            opencv_image, cached_square(dilation_radius), borderType=cv2.BORDER_CONSTANT, borderValue=0
+        )
+        return dilated_image.view(np.bool_) if image.dtype == np.bool_ else dilated_image
+    # A square is separable, so the dilation is a 1D maximum filter down the columns then along the rows
+    # (the disk used by binary_dilation_fast is not separable and stays with OpenCV)
+    dilated_image = maximum_filter1d(image, size=size, axis=0, mode='constant')
+    maximum_filter1d(dilated_image, size=size, axis=1, output=dilated_image, mode='constant')
+    return dilated_image.astype(image.dtype, copy=False)
 
 
 def binary_erosion_fast3(image, erosion_radius):
@@ -896,9 +1427,19 @@ def binary_erosion_fast3(image, erosion_radius):
     """
     # Use a square structuring element with size based on the erosion radius
     size = 2 * erosion_radius + 1
-    # Perform the erosion using minimum_filter
-    eroded_image = minimum_filter(image, size=size, mode='constant')
-    return eroded_image.astype(image.dtype)
+    opencv_image = _as_opencv_morphology_image(image)
+    if opencv_image is not None:
+        # OpenCV runs a square kernel as separable row and column passes with SIMD; the constant
+        # zero border matches minimum_filter's mode='constant'
+        eroded_image = cv2.erode(
+            opencv_image, cached_square(erosion_radius), borderType=cv2.BORDER_CONSTANT, borderValue=0
+        )
+        return eroded_image.view(np.bool_) if image.dtype == np.bool_ else eroded_image
+    # A square is separable, so the erosion is a 1D minimum filter down the columns then along the rows
+    # (the disk used by binary_erosion_fast is not separable and stays with OpenCV)
+    eroded_image = minimum_filter1d(image, size=size, axis=0, mode='constant')
+    minimum_filter1d(eroded_image, size=size, axis=1, output=eroded_image, mode='constant')
+    return eroded_image.astype(image.dtype, copy=False)
 
 
 
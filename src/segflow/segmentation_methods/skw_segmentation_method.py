@@ -1,6 +1,7 @@
 import numpy as np
 from skimage import filters, morphology, measure, segmentation, exposure, feature, util
 from scipy import ndimage as ndi
+from tqdm import tqdm
 
 
 from .generic_segmentation_method import GenericSegmentationMethod
@@ -39,11 +40,10 @@ class SKWSegmentationMethod(GenericSegmentationMethod):
         """
         # Extract the DAPI channel (channel 0)
         segmentation_tiles = []
-        for i in range(0, len(tiles), batch_size):
+        for i in tqdm(range(0, len(tiles), batch_size), desc="Segmenting batches", total=(len(tiles) - 1) // batch_size + 1):
             batch_tiles = tiles[i:i+batch_size]
             batch_segmentation = [self._segment_single_tile(tile) for tile in batch_tiles]
             segmentation_tiles.extend(batch_segmentation)
-            print(f"Processed batch {i // batch_size + 1}/{(len(tiles) - 1) // batch_size + 1}")
         segmentation_tiles = np.array(segmentation_tiles)[..., np.newaxis].astype(np.uint32)
         return segmentation_tiles
 
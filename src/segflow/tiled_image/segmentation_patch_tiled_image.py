@@ -1,10 +1,12 @@
-from skimage.measure import label, regionprops
-from scipy.ndimage import binary_fill_holes
+from skimage.measure import label
+import cv2
 
 from tqdm import tqdm
 from copy import deepcopy, copy
 import numpy as np
 import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
 
 from .segmentation_tiled_image import SegmentationTiledImage
 from ..full_image import SegmentationImage
@@ -61,67 +63,67 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
         half_width = bbox_width // 2
 
         n_patches = len(centroids)
-        patches_array = np.zeros((n_patches, bbox_height, bbox_width), dtype=input_image.dtype)
-        patch_descriptions = []
         image_height, image_width = input_image.shape
 
-        # Iterate through each region to extract patches and metadata
-        for idx, (region_label, (centroid_y, centroid_x)) in tqdm(enumerate(centroids.items()), desc="Building patches:", total=n_patches):
-
-            # Calculate bounding box coordinates
-            y_min = centroid_y - half_height
-            y_max = centroid_y + half_height
-            x_min = centroid_x - half_width
-            x_max = centroid_x + half_width
-
-            # Initialize edge indicators
-            on_edge = {'top': False,'bottom': False,'left': False,'right': False}
-
-            # Adjust coordinates if they are out of bounds and set the on_edge parameters
-            if y_min < 0:
-                    on_edge['top'] = True
-                    y_min = 0
-                    y_max = bbox_size[0]
-            if y_max > input_image.shape[0]:
-                    on_edge['bottom'] = True
-                    y_max = input_image.shape[0]
-                    y_min = input_image.shape[0] - bbox_size[0]
-            if x_min < 0:
-                    on_edge['left'] = True
-                    x_min = 0
-                    x_max = bbox_size[1]
-            if x_max > input_image.shape[1]:
-                    on_edge['right'] = True
-                    x_max = input_image.shape[1]
-                    x_min = input_image.shape[1] - bbox_size[1]
-
-            # Might want to ensure that the bounding box has the correct size,
-            # but we would be in trouble if it didn't so lets let it fail hard if its off
-            #y_min = max(y_min, 0)
-            #y_max = min(y_max, input_image.shape[0])
-            #x_min = max(x_min, 0)
-            #x_max = min(x_max, input_image.shape[1])
-
-            # Count pixels within the bounding box that belong to the current label
-            bbox_y_max = y_min + bbox_size[0]
-            bbox_x_max = x_min + bbox_size[1]
-            patch = input_image[y_min:bbox_y_max, x_min:bbox_x_max]
-
-            patches_array[idx,:,:] = patch.copy()
-
-            # Store metadata
-            patch_descriptions.append({
-                'centroid': (centroid_y, centroid_x),
+        # Gather the labels and centroids of all regions into arrays so the bounding boxes
+        # of every patch are calculated at once
+        region_labels = centroids.keys()
+        centroid_values = centroids.values()
+        centroid_array = np.array(centroid_values, dtype=np.intp).reshape(n_patches, 2)
+        centroid_y, centroid_x = centroid_array[:, 0], centroid_array[:, 1]
+
+        # Calculate bounding box coordinates
+        y_min = centroid_y - half_height
+        y_max = centroid_y + half_height
+        x_min = centroid_x - half_width
+        x_max = centroid_x + half_width
+
+        # Adjust coordinates if they are out of bounds and set the on_edge parameters
+        on_edge_top = y_min < 0
+        y_min = np.where(on_edge_top, 0, y_min)
+        y_max = np.where(on_edge_top, bbox_height, y_max)
+        on_edge_bottom = y_max > image_height
+        y_min = np.where(on_edge_bottom, image_height - bbox_height, y_min)
+        on_edge_left = x_min < 0
+        x_min = np.where(on_edge_left, 0, x_min)
+        x_max = np.where(on_edge_left, bbox_width, x_max)
+        on_edge_right = x_max > image_width
+        x_min = np.where(on_edge_right, image_width - bbox_width, x_min)
+
+        # Copy every patch out of the image in one gather over the windows at the patch corners.
+        # Might want to ensure that the bounding box has the correct size,
+        # but we would be in trouble if it didn't so lets let it fail hard if its off
+        windows = np.lib.stride_tricks.sliding_window_view(input_image.view(np.ndarray), (bbox_height, bbox_width))
+        patches_array = windows[y_min, x_min].reshape(n_patches, bbox_height, bbox_width)
+
+        # Convert the bounding boxes and edge flags to Python values in bulk rather than one NumPy scalar at a time
+        bbox_positions = zip(y_min.tolist(), x_min.tolist())
+        edge_flags = zip(on_edge_top.tolist(), on_edge_bottom.tolist(), on_edge_left.tolist(), on_edge_right.tolist())
+
+        # The region properties are calculated together for the same labels in the same order as
+        # the centroids, so their values are taken in bulk rather than looked up by label per patch
+        region_properties = zip(
+            areas.values(), minor_axis_lengths.values(), major_axis_lengths.values(),
+            eccentricities.values(), solidities.values(), extents.values(), orientations.values()
+        )
+
+        # Store metadata
+        patch_descriptions = []
+        append_description = patch_descriptions.append
+        for region_label, centroid, bbox_position, (top, bottom, left, right), properties in zip(region_labels, centroid_values, bbox_positions, edge_flags, region_properties):
+            area, minor_axis_length, major_axis_length, eccentricity, solidity, extent, orientation = properties
+            append_description({
+                'centroid': centroid,
                 'region_label': region_label,
-                'bbox_position': (y_min, x_min),
-                'on_edge': on_edge,
-                'area': areas[region_label],
-                'minor_axis_length': minor_axis_lengths[region_label],
-                'major_axis_length': major_axis_lengths[region_label],
-                'eccentricity': eccentricities[region_label],
-                'solidity': solidities[region_label],
-                'extent': extents[region_label],
-                'orientation': orientations[region_label]
+                'bbox_position': bbox_position,
+                'on_edge': {'top': top, 'bottom': bottom, 'left': left, 'right': right},
+                'area': area,
+                'minor_axis_length': minor_axis_length,
+                'major_axis_length': major_axis_length,
+                'eccentricity': eccentricity,
+                'solidity': solidity,
+                'extent': extent,
+                'orientation': orientation
             })
 
         # Call the base class method to create the tiled image
@@ -188,39 +190,34 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
         # Initialize an empty output image with the same shape as the original image
         output_image = np.zeros(self.original_shape, dtype=self.dtype)
 
-        # Iterate over each patch and its corresponding description
-        for i, patch_description in enumerate(self.patch_descriptions):
-            patch = self[i]
-            # Extract bounding box position from patch_description
-            y_min, x_min = patch_description['bbox_position']
-
-            # Get the dimensions of the patch
-            patch_height, patch_width = patch.shape
-
-            # Calculate the area in the output image to update (y_max, x_max)
-            y_max = y_min + patch_height
-            x_max = x_min + patch_width
-
-            # Ensure that the patch does not exceed the output image dimensions
-            if y_max > output_image.shape[0] or x_max > output_image.shape[1]:
+        patches = self.view(np.ndarray)
+        n_patches, patch_height, patch_width = patches.shape[:3]
+
+        # Extract bounding box positions from the patch descriptions and calculate the area
+        # in the output image each patch updates (y_max, x_max)
+        bbox_positions = np.array([patch_description['bbox_position'] for patch_description in self.patch_descriptions], dtype=np.intp).reshape(-1, 2)
+        y_min, x_min = bbox_positions[:, 0], bbox_positions[:, 1]
+        y_max = y_min + patch_height
+        x_max = x_min + patch_width
+
+        # Ensure that no patch exceeds the output image dimensions, and that shapes match
+        # (a patch starting before the image would be clipped to a smaller region)
+        exceeds_bounds = (y_max > output_image.shape[0]) | (x_max > output_image.shape[1])
+        shape_mismatch = (y_min < 0) | (x_min < 0)
+        invalid = np.flatnonzero(exceeds_bounds | shape_mismatch)
+        if invalid.size:
+            i = invalid[0]
+            if exceeds_bounds[i]:
                 raise ValueError(f"Patch at {i} exceeds bounds of the output image")
+            region_shape = output_image[y_min[i]:y_max[i], x_min[i]:x_max[i]].shape
+            raise ValueError(f"Shape mismatch at patch {i}: "
+                             f"patch shape {patches[i].shape} vs region shape {region_shape}")
 
-            # Create a mask for patch > 0 (treat patch == 0 as transparent)
-            patch_mask = patch > 0
-
-            # Update the output_image at the corresponding location using patch_mask
-            output_image_region = output_image[y_min:y_max, x_min:x_max]
-            
-            # Ensure shapes match before applying the mask
-            if output_image_region.shape != patch.shape:
-                raise ValueError(f"Shape mismatch at patch {i}: "
-                                 f"patch shape {patch.shape} vs region shape {output_image_region.shape}")
-
-            # Apply the mask to update only the non-zero pixels
-            output_image_region[patch_mask] = patch[patch_mask]
-
-            # Now place the updated region back into the full image
-            output_image[y_min:y_max, x_min:x_max] = output_image_region
+        # Copy only the non-zero pixels of each patch (patch == 0 is transparent), in order, so later
+        # patches win where they overlap; the mask is built per patch to avoid one for the whole stack
+        for i in range(n_patches):
+            patch = patches[i]
+            np.copyto(output_image[y_min[i]:y_max[i], x_min[i]:x_max[i]], patch, where=patch > 0)
 
         # Return the combined image as a SegmentationImage
         return SegmentationImage(output_image)
@@ -263,94 +260,102 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
         
         Modifies the current SegmentationPatchTiledImage in place.
         """
-        # Iterate over each patch and its corresponding description
-        for i, centroid in tqdm(enumerate(self.patch_descriptions), desc="Isolating cells", total=len(self.patch_descriptions)):
-            region_label = centroid['region_label']  # The label that should be kept in the current patch
-    
-            # Get the current patch
-            patch = self[i]
-    
-            # Zero out all labels in the patch except the region_label
-            self[i] = np.where(patch == region_label, patch, 0)
-    
+        # The label that should be kept in each patch, shaped to broadcast against the (n_patches, height, width) stack
+        region_labels = np.array([description['region_label'] for description in self.patch_descriptions], dtype=self.dtype).reshape(-1, 1, 1)
+
+        # Zero out all labels in every patch except its region_label in one pass over the stack
+        patches = self.view(np.ndarray)
+        np.multiply(patches, patches == region_labels, out=patches)
+
         return self
 
     
-    def remove_disjointed_pixels(self):
+    def remove_disjointed_pixels(self, num_workers=None):
         """
         Filter through the segments and for each label on each segment,
         if a label is disjointed remove the smallest labels, keeping only the largest connected component.
 
         Will be much faster if isolate_center_labels() is run first
+
+        Parameters:
+        - num_workers: Number of threads used to process patches (defaults to the number of CPUs).
         """
-        total_pixels_removed = 0  # Counter for total removed pixels
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
 
-        # Iterate through each patch in the image
-        for i in tqdm(range(self.shape[0]), desc="Remove disjointed pixels", total=self.shape[0]):
-            patch = self[i]  # Get the current patch (256x256)
+        def remove_from_patch(i):
+            patch = self[i].view(np.ndarray)  # Get the current patch (256x256), a view so edits update self directly
 
-            # Get the unique labels in the patch (ignoring label 0 for background)
-            unique_labels = np.unique(patch)
-            unique_labels = unique_labels[unique_labels > 0]  # Exclude background
+            # Label the connected components of every label at once; pixels of different labels
+            # are never connected, so each component belongs to exactly one label
+            labeled_components, num_components = label(patch, return_num=True, connectivity=2)
+            if num_components == 0:
+                return 0
 
-            # Iterate over each unique label and process the connected components
-            for label_value in unique_labels:
-                # Create a binary mask where the current label is 1 and everything else is 0
-                label_mask = patch == label_value
+            # Measure the size and find the label of each connected component
+            component_sizes = np.bincount(labeled_components.ravel(), minlength=num_components + 1)
+            component_labels = np.zeros(num_components + 1, dtype=patch.dtype)
+            component_labels[labeled_components.ravel()] = patch.ravel()
 
-                # Label the connected components for this specific label
-                labeled_components, num_components = label(label_mask, return_num=True, connectivity=2)
+            # Find the unique labels in the patch (ignoring label 0 for background) split into multiple components
+            unique_labels, components_per_label = np.unique(component_labels[1:], return_counts=True)
+            disjointed_labels = unique_labels[(unique_labels > 0) & (components_per_label > 1)]
+            if disjointed_labels.size == 0:
+                return 0
 
-                if num_components > 1:  # Only process if there are multiple connected components
-                    # Measure the size of each connected component
-                    component_sizes = [(region.label, region.area) for region in regionprops(labeled_components)]
+            # Labels are processed in increasing order and zeroing out everything but the largest connected
+            # component of the first disjointed label leaves nothing else to process, so only that label matters
+            label_value = disjointed_labels[0]
+            label_components = np.flatnonzero(component_labels == label_value)
 
-                    # Find the label of the largest connected component
-                    largest_component_label = max(component_sizes, key=lambda x: x[1])[0]
+            # Find the largest connected component (the first one in scan order on ties)
+            largest_component_label = label_components[np.argmax(component_sizes[label_components])]
 
-                    # Count the pixels to be removed (smaller components)
-                    pixels_to_remove = np.sum(labeled_components != largest_component_label)
-                    total_pixels_removed += pixels_to_remove
+            # Zero out all pixels except for the largest connected component
+            patch[labeled_components != largest_component_label] = 0
 
-                    # Zero out all pixels except for the largest connected component
-                    patch[labeled_components != largest_component_label] = 0
+            # Count the pixels removed (smaller components)
+            return patch.size - component_sizes[largest_component_label]
 
-            # Update the patch with the new version where disjointed components are removed
-            self[i] = patch
+        # Patches are independent views into self, so they can be processed concurrently
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            pixels_removed = list(tqdm(executor.map(remove_from_patch, range(self.shape[0])), desc="Remove disjointed pixels", total=self.shape[0]))
+        total_pixels_removed = sum(pixels_removed)  # Counter for total removed pixels
 
         # Output the total number of removed pixels to stderr
         print(f"Total pixels removed: {total_pixels_removed}", file=sys.stderr)
 
         return self
 
-    def find_patches_with_small_labels(self, min_area_px):
+    def find_patches_with_small_labels(self, min_area_px, num_workers=None):
         """
         Identify labels in each patch that have fewer pixels than the min_area_px threshold.
 
         Parameters:
         - min_area_px: Minimum number of pixels required for a label to be considered significant.
+        - num_workers: Number of threads used to process patches (defaults to the number of CPUs).
 
         Returns:
         - small_labels (set): A set of label values that have fewer pixels than the min_area_px threshold.
         """
-        small_labels = set()  # Set to store small labels
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
 
-        # Iterate through each patch in the image
-        for i in tqdm(range(self.shape[0]), desc="Identifying small labels", total=self.shape[0]):
-            patch = self[i]  # Get the current patch (256x256)
+        def find_small_labels(i):
+            patch = self[i].view(np.ndarray)  # Get the current patch (256x256)
 
-            # Get the unique labels in the patch (ignoring label 0 for background)
-            unique_labels = np.unique(patch)
-            unique_labels = unique_labels[unique_labels > 0]  # Exclude background
+            # Get the unique labels in the patch and count the pixels of every label in one pass
+            unique_labels, label_indices = self._index_labels(patch)
+            label_pixel_counts = np.bincount(label_indices.ravel(), minlength=unique_labels.size)
 
-            # Iterate over each unique label and check its total pixel count
-            for label_value in unique_labels:
-                # Count the total number of pixels for the current label
-                label_pixel_count = np.sum(patch == label_value)
+            # Labels whose pixel count is smaller than the threshold (ignoring label 0 for background)
+            return unique_labels[(unique_labels > 0) & (label_pixel_counts < min_area_px)]
 
-                # If the label's pixel count is smaller than the threshold, add to the list
-                if label_pixel_count < min_area_px:
-                    small_labels.add(label_value)
+        # Patches are independent, so they can be processed concurrently
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            patch_small_labels = list(tqdm(executor.map(find_small_labels, range(self.shape[0])), desc="Identifying small labels", total=self.shape[0]))
+
+        small_labels = set()  # Set to store small labels
+        for labels in patch_small_labels:
+            small_labels.update(labels)
 
         return small_labels
 
@@ -363,37 +368,30 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
         omit the patch. For all other patches, set any pixel matching a label in labels_to_drop to zero.
 
         Parameters:
-        - labels_to_drop (list): List of region_label integers to be dropped or zeroed out.
+        - labels_to_drop (list or set): Collection of region_label integers to be dropped or zeroed out.
 
-        Updates:
-        - self: Removes the specified patches and updates self.patch_descriptions and self.positions accordingly.
+        Returns:
+        - A new SegmentationPatchTiledImage without the specified patches, with patch_descriptions and positions updated accordingly.
         """
-        new_patches = []
-        new_patch_descriptions = []
-        new_positions = []
-
-        # Iterate over each patch, description, and position
-        for i, (patch, description, position) in enumerate(zip(self, self.patch_descriptions, self.positions)):
-            region_label = description['region_label']
-
-            if region_label in labels_to_drop:
-                # Omit the patch if its region_label is in the labels_to_drop list
-                continue
+        # Accept any iterable of labels, such as the sets returned by the find_patches_with_* methods
+        # (np.asarray would wrap a set in a 0-d object array that matches nothing)
+        labels_to_drop = np.fromiter(labels_to_drop, dtype=self.dtype)
 
-            # Set any pixel that matches a label in labels_to_drop to zero
-            patch[np.isin(patch, labels_to_drop)] = 0
-
-            # Append the updated patch, description, and position to the new lists
-            new_patches.append(patch)
-            new_patch_descriptions.append(description)
-            new_positions.append(position)
+        # Omit the patches whose region_label is in the labels_to_drop list
+        region_labels = np.array([description['region_label'] for description in self.patch_descriptions])
+        keep = ~np.isin(region_labels, labels_to_drop)
 
         # If no patches remain, raise an error
-        if len(new_patches) == 0:
+        if not keep.any():
             raise ValueError("All patches were removed.")
 
-        # Convert list of new_patches to a numpy array
-        new_patches_array = np.array(new_patches)
+        # Gather the remaining patches into a new array, with their descriptions and positions
+        new_patches_array = self.view(np.ndarray)[keep]
+        new_patch_descriptions = [description for description, kept in zip(self.patch_descriptions, keep) if kept]
+        new_positions = [position for position, kept in zip(self.positions, keep) if kept]
+
+        # Set any pixel that matches a label in labels_to_drop to zero, across all remaining patches at once
+        new_patches_array[np.isin(new_patches_array, labels_to_drop)] = 0
 
         # Rebuild the SegmentationPatchTiledImage using the from_tiled_array class method
         return self.__class__.from_tiled_array(
@@ -410,21 +408,20 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
         Returns:
         - missing_labels (list): A list of 'region_label' values that are missing from their respective patches.
         """
-        missing_labels = []  # List to store labels that are missing from their patches
+        # The region_label of each patch, shaped to broadcast against the (n_patches, height, width) stack
+        region_labels = [description['region_label'] for description in self.patch_descriptions]
+        region_label_array = np.asarray(region_labels).reshape(-1, 1, 1)
 
-        # Iterate over each patch, description, and position
-        for i, (patch, description) in enumerate(zip(self, self.patch_descriptions)):
-            region_label = description['region_label']
+        # Check if the region_label is present in each patch with one reduction over the whole stack
+        is_missing = ~(self.view(np.ndarray) == region_label_array).any(axis=(1, 2))
 
-            # Check if the region_label is present in the patch
-            if not np.any(patch == region_label):
-                # If the region_label is missing, save it to the missing_labels list
-                missing_labels.append(region_label)
+        # Save the region_labels that are missing from their patches
+        missing_labels = [region_label for region_label, missing in zip(region_labels, is_missing) if missing]
 
         return missing_labels
 
 
-    def find_patches_with_circumscribed_labels(self):
+    def find_patches_with_circumscribed_labels(self, num_workers=None):
         """
         Identify labels that are circumscribed by the main 'region_label' in each patch.
         
@@ -434,34 +431,54 @@ class SegmentationPatchTiledImage(SegmentationTiledImage):
 
         You should not run isolate_center_labels() before running this, because this requires having all the patch labels present.
 
+        Parameters:
+        - num_workers: Number of threads used to process patches (defaults to the number of CPUs).
+
         Returns:
         - circumscribed_labels (set): A set of integers corresponding to labels that are circumscribed.
         """
-        circumscribed_labels = set()  # Store labels that are circumscribed
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
 
-        # Iterate through each patch
-        for i in tqdm(range(self.shape[0]), desc="Finding circumscribed labels", total=self.shape[0]):
-            patch = self[i]  # Get the current patch (256x256)
+        def find_circumscribed_labels(i):
+            patch = self[i].view(np.ndarray)  # Get the current patch (256x256)
             region_label = self.patch_descriptions[i]['region_label']  # The main label for this patch
 
             # Create binary mask for the region_label and flood fill any internal holes
             region_mask = (patch == region_label)
-            filled_region_mask = binary_fill_holes(region_mask)
+            filled_region_mask = fill_holes(region_mask)
 
-            # Get all unique labels in the patch, excluding the background (label 0) and the region_label
-            unique_labels = np.unique(patch)
-            unique_labels = unique_labels[(unique_labels > 0) & (unique_labels != region_label)]
+            # Any label overlapping the filled region mask is circumscribed, so gather the labels
+            # under the mask in one pass, excluding the background (label 0) and the region_label
+            overlapping_labels = np.unique(patch[filled_region_mask])
+            return overlapping_labels[(overlapping_labels > 0) & (overlapping_labels != region_label)]
 
-            # Check each label to see if it overlaps with the filled region mask
-            for label_value in unique_labels:
-                # Create binary mask for the current label
-                label_mask = (patch == label_value)
+        # Patches are independent, so they can be processed concurrently
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            patch_circumscribed_labels = list(tqdm(executor.map(find_circumscribed_labels, range(self.shape[0])), desc="Finding circumscribed labels", total=self.shape[0]))
 
-                # Check if there is any overlap between the label mask and the filled region mask
-                if np.any(label_mask & filled_region_mask):
-                    # If there is overlap, the label is circumscribed
-                    circumscribed_labels.add(label_value)
+        circumscribed_labels = set()  # Store labels that are circumscribed
+        for labels in patch_circumscribed_labels:
+            circumscribed_labels.update(labels)
 
         # Return the set of circumscribed labels
-        return circumscribed_labels            
+        return circumscribed_labels
+
+
+def fill_holes(mask):
+    """
+    Fill the holes in a binary mask, like scipy's binary_fill_holes: every background pixel that is not
+    4-connected to the border of the mask becomes foreground.
+
+    Parameters:
+    - mask: 2D boolean numpy array.
+
+    Returns:
+    - Boolean numpy array with the holes of the mask filled.
+    """
+    # Pad with a ring of background so one flood fill from the corner reaches all the background touching the border
+    background = np.ones((mask.shape[0] + 2, mask.shape[1] + 2), dtype=np.uint8)
+    background[1:-1, 1:-1] = ~mask
+    cv2.floodFill(background, None, (0, 0), 2, flags=4)
 
+    # Whatever the flood fill did not reach is either the mask itself or one of its holes
+    return background[1:-1, 1:-1] != 2
@@ -2,6 +2,8 @@ from .tiled_image import TiledImage
 import numpy as np
 from skimage.measure import label
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+import os
 
 from ..full_image import SegmentationImage
 
@@ -81,52 +83,72 @@ class SegmentationTiledImage(TiledImage):
         full_segmentation_mask = np.zeros(self.padded_shape, dtype=np.int32)
         max_global_label = 0
 
-        for idx, (tile_segmentation, (y, x)) in tqdm(enumerate(zip(self, self.positions)), desc="Processing tiles", total=len(self.positions)):
-            if len(tile_segmentation.shape) == 3:
-                tile_segmentation = tile_segmentation.squeeze(axis=-1)
+        # Drop a trailing channel axis once so every tile is (height, width)
+        segmentation_tiles = self.view(np.ndarray)
+        if segmentation_tiles.ndim == 4:
+            segmentation_tiles = segmentation_tiles.squeeze(axis=-1)
+
+        for idx, (tile_segmentation, (y, x)) in tqdm(enumerate(zip(segmentation_tiles, self.positions)), desc="Processing tiles", total=len(self.positions)):
             y_end = y + self.bbox_size[0]
             x_end = x + self.bbox_size[1]
 
-            # Extract the region from the full segmentation mask that corresponds to the tile
+            # View of the region of the full segmentation mask that corresponds to the tile;
+            # writes to it update the full mask in place
             full_mask_region = full_segmentation_mask[y:y_end, x:x_end]
 
-            # Find unique labels in the tile
-            tile_labels = np.unique(tile_segmentation)
-            tile_labels = tile_labels[tile_labels != 0]
+            # Index the labels in the tile and in the region so per-label pixel counts can be
+            # gathered with a single bincount instead of one boolean scan per label
+            tile_labels, tile_inverse = self._index_labels(tile_segmentation)
+            region_labels, region_inverse = np.unique(full_mask_region, return_inverse=True)
+            n_region_labels = region_labels.size
+
+            # pair_counts[i, j] is the number of pixels with tile label i and region label j
+            pair_counts = np.bincount(
+                (tile_inverse * n_region_labels + region_inverse.reshape(tile_segmentation.shape)).ravel(),
+                minlength=tile_labels.size * n_region_labels
+            ).reshape(tile_labels.size, n_region_labels)
+            tile_areas = pair_counts.sum(axis=1)
+            region_areas = pair_counts.sum(axis=0)
+            region_is_label = region_labels != 0
+
+            # Label each tile label will be written as (background stays 0)
+            new_labels = np.zeros(tile_labels.size, dtype=full_segmentation_mask.dtype)
+            needs_new_label = tile_labels != 0
+
+            # Only tile labels that overlap existing labels need an IoU decision
+            overlaps_existing = needs_new_label & (pair_counts[:, region_is_label] > 0).any(axis=1)
+
+            for tile_index in np.nonzero(overlaps_existing)[0]:
+                # Find the labels in the overlap region
+                intersections = pair_counts[tile_index]
+                overlapping = np.nonzero((intersections > 0) & region_is_label)[0]
+
+                # Calculate IoU with existing labels
+                intersection = intersections[overlapping]
+                union = tile_areas[tile_index] + region_areas[overlapping] - intersection
+                ious = intersection / union
 
-            for tile_label in tile_labels:
-                tile_mask = tile_segmentation == tile_label
-                overlap_mask = full_mask_region > 0
+                # Get the best IoU match
+                best = np.argmax(ious)
+                best_iou = ious[best]
 
-                # Find the labels in the overlap region
-                overlapping_labels = np.unique(full_mask_region[tile_mask & overlap_mask])
-                overlapping_labels = overlapping_labels[overlapping_labels != 0]
-
-                if overlapping_labels.size == 0:
-                    # If no overlap, assign a new global label
-                    max_global_label += 1
-                    full_mask_region[tile_mask] = max_global_label
-                else:
-                    # If overlap, calculate IoU with existing labels
-                    ious = []
-                    for overlap_label in overlapping_labels:
-                        full_mask_label_mask = full_mask_region == overlap_label
-                        iou = self._calculate_iou(tile_mask, full_mask_label_mask)
-                        ious.append((iou, overlap_label))
-
-                    # Get the best IoU match
-                    best_iou, best_overlap_label = max(ious, key=lambda x: x[0])
-
-                    if best_iou >= iou_threshold:
-                        # Merge labels if IoU is above the threshold
-                        full_mask_region[tile_mask] = best_overlap_label
-                    else:
-                        # Otherwise, assign a new label
-                        max_global_label += 1
-                        full_mask_region[tile_mask] = max_global_label
-
-            # Place the updated region back into the full segmentation mask
-            full_segmentation_mask[y:y_end, x:x_end] = full_mask_region
+                # Take this label's pixels away from the region labels it covers
+                region_areas -= intersections
+
+                if best_iou >= iou_threshold:
+                    # Merge labels if IoU is above the threshold
+                    new_labels[tile_index] = region_labels[overlapping[best]]
+                    region_areas[overlapping[best]] += tile_areas[tile_index]
+                    needs_new_label[tile_index] = False
+
+            # Every other label gets a new global label, in tile label order
+            n_new_labels = np.count_nonzero(needs_new_label)
+            new_labels[needs_new_label] = np.arange(max_global_label + 1, max_global_label + n_new_labels + 1)
+            max_global_label += n_new_labels
+
+            # Write the assigned labels into the region in one pass
+            tile_mask = tile_segmentation != 0
+            full_mask_region[tile_mask] = new_labels[tile_inverse[tile_mask]]
 
         # Optional: Relabel connected components
         full_segmentation_mask = label(full_segmentation_mask)
@@ -141,6 +163,40 @@ class SegmentationTiledImage(TiledImage):
         return SegmentationImage(full_segmentation_mask)
 
 
+    @staticmethod
+    def _index_labels(tile_segmentation):
+        """
+        Find the sorted labels of a tile and the index of each pixel's label, like
+        np.unique(tile_segmentation, return_inverse=True) with the inverse kept in the tile's shape.
+
+        Tiles from high_confidence_tile_filter hold background plus one consecutive run of labels,
+        so when the non-zero labels span fewer values than the tile has pixels they are indexed
+        with a bincount over that span instead of a sort.
+
+        Parameters:
+        - tile_segmentation: 2D array of non-negative integer labels.
+
+        Returns:
+        - labels: Sorted unique labels in the tile.
+        - inverse: Array of the tile's shape indexing each pixel's label in labels.
+        """
+        foreground = tile_segmentation != 0
+        max_label = int(tile_segmentation.max()) if tile_segmentation.size else 0
+        min_label = int(np.min(tile_segmentation, where=foreground, initial=max_label)) if max_label else 0
+        if max_label - min_label >= tile_segmentation.size:
+            labels, inverse = np.unique(tile_segmentation, return_inverse=True)
+            return labels, inverse.reshape(tile_segmentation.shape)
+
+        # Shift labels onto 1..span so background stays at 0
+        offsets = np.where(foreground, tile_segmentation.astype(np.intp) - (min_label - 1), 0)
+        present = np.bincount(offsets.ravel(), minlength=max_label - min_label + 2) > 0
+        present_offsets = np.flatnonzero(present)
+        labels = np.where(present_offsets == 0, 0, present_offsets + (min_label - 1)).astype(tile_segmentation.dtype)
+
+        # Rank of each present offset gives the position of its label in labels
+        ranks = np.cumsum(present) - 1
+        return labels, ranks[offsets]
+
     def _calculate_iou(self, mask1, mask2):
         """
         Calculate the Intersection-over-Union (IoU) of two boolean masks.
@@ -158,57 +214,55 @@ class SegmentationTiledImage(TiledImage):
             return 0.0
         return intersection / union
 
-    def high_confidence_tile_filter(self, margin_size_px, in_place = False):
+    def high_confidence_tile_filter(self, margin_size_px, in_place = False, num_workers=None):
         """
         Process segmentation tiles to extract high-confidence central regions and adjust labels to ensure uniqueness.
         
         Parameters:
         - segmentation_tiles: Numpy array of segmented tiles.
         - positions: List of positions where each tile starts in the original image.
+        - num_workers: Number of threads used to process tiles (defaults to the number of CPUs).
         
         Returns:
         - Numpy array of high-confidence segmented tiles.
         """
 
-        segmentation_tiles = self
-        positions = self.positions
-
-        confidence_segmentation_tiles = []
-        max_label = 0  # Initialize max_label for label uniqueness
+        segmentation_tiles = self.view(np.ndarray)
+        n_tiles = len(self.positions)
+        num_workers = num_workers if num_workers is not None else os.cpu_count()
 
-        for idx, (tile_segmentation, (y, x)) in tqdm(enumerate(zip(segmentation_tiles, positions)),desc="Removing edge cells",total=len(positions)):
-            # Extract the high-confidence central region of the tile
-            y_start = margin_size_px
-            y_end = self.bbox_size[0] - margin_size_px
-            x_start = margin_size_px
-            x_end = self.bbox_size[1] - margin_size_px
+        # Extract the high-confidence central region of the tile
+        y_start = margin_size_px
+        y_end = self.bbox_size[0] - margin_size_px
+        x_start = margin_size_px
+        x_end = self.bbox_size[1] - margin_size_px
 
-            high_confidence_region = tile_segmentation[y_start:y_end, x_start:x_end]
+        def find_high_confidence_labels(idx):
+            high_confidence_region = segmentation_tiles[idx, y_start:y_end, x_start:x_end]
             labels_in_high_confidence = np.unique(high_confidence_region)
-            labels_in_high_confidence = labels_in_high_confidence[labels_in_high_confidence != 0]
+            return labels_in_high_confidence[labels_in_high_confidence != 0]
 
-            # Zero out labels not present in the high-confidence region
-            mask = np.isin(tile_segmentation, labels_in_high_confidence)
-            tile_segmentation_cleaned = np.where(mask, tile_segmentation, 0)
+        confidence_segmentation_tiles = np.empty(segmentation_tiles.shape, dtype=segmentation_tiles.dtype)
 
-            # Adjust labels to ensure uniqueness across all tiles
-            labels_to_adjust = np.unique(tile_segmentation_cleaned)
-            labels_to_adjust = labels_to_adjust[labels_to_adjust != 0]
+        def adjust_tile(idx, labels_to_adjust, max_label):
+            tile_segmentation = segmentation_tiles[idx]
 
-            # Create a mapping to adjust labels
-            label_mapping = {label: label + max_label for label in labels_to_adjust}
-            tile_segmentation_adjusted = np.zeros_like(tile_segmentation_cleaned)
-    
-            for old_label, new_label in label_mapping.items():
-                tile_segmentation_adjusted[tile_segmentation_cleaned == old_label] = new_label
+            # Create a lookup table assigning consecutive labels after max_label; labels not present
+            # in the high-confidence region map to 0, so they are zeroed out by the same gather
+            label_mapping = np.zeros(tile_segmentation.max() + 1, dtype=tile_segmentation.dtype)
+            label_mapping[labels_to_adjust] = np.arange(1, labels_to_adjust.size + 1) + max_label
+            confidence_segmentation_tiles[idx] = label_mapping[tile_segmentation]
 
-            # Update max_label for the next tile
-            if labels_to_adjust.size > 0:
-                max_label = tile_segmentation_adjusted.max()
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            # Tiles are independent, so their labels can be gathered concurrently (NumPy releases the GIL)
+            tile_labels = list(tqdm(executor.map(find_high_confidence_labels, range(n_tiles)), desc="Finding edge cells", total=n_tiles))
 
-            confidence_segmentation_tiles.append(tile_segmentation_adjusted)
+            # Prefix sum of label counts gives each tile the max_label it starts after, keeping labels unique
+            label_counts = np.array([labels.size for labels in tile_labels], dtype=np.int64)
+            max_labels = np.concatenate(([0], np.cumsum(label_counts)[:-1]))
 
-        confidence_segmentation_tiles = np.array(confidence_segmentation_tiles)
+            # Relabel every tile against its own starting label
+            list(tqdm(executor.map(adjust_tile, range(n_tiles), tile_labels, max_labels), desc="Removing edge cells", total=n_tiles))
         
         output_image = SegmentationTiledImage.from_tiled_array(confidence_segmentation_tiles, self.positions, self.original_shape, self.pad_top, self.pad_bottom, self.pad_left, self.pad_right)
 
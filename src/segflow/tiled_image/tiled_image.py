@@ -1,6 +1,6 @@
 import numpy as np
 from tqdm import tqdm
-from scipy.ndimage import gaussian_filter
+from scipy.ndimage import gaussian_filter1d
 
 from ..full_image import ContinuousSingleChannelImage
 
@@ -167,6 +167,9 @@ class TiledImage(np.ndarray):
         """
         Pad the input image and extract tiles from it.
 
+        The padded image is never allocated. Each axis is padded virtually through an index
+        map into the input image, and tiles are gathered directly through those maps.
+
         Parameters:
         - input_image: Numpy array of the original image.
         - bbox_size: Size of each tile.
@@ -175,21 +178,18 @@ class TiledImage(np.ndarray):
         
         Returns:
         - tiles: Numpy array of extracted tiles.
-        - positions: List of positions where each tile starts in the padded image.
+        - positions: (n_tiles, 2) int32 array of the (y, x) positions where each tile starts in the padded image.
         - pad_top: Total padding added to the top of the image.
         - pad_bottom: Total padding added to the bottom of the image.
         - pad_left: Total padding added to the left of the image.
         - pad_right: Total padding added to the right of the image.
         """
         # Step 1: Add minimum padding as a margin all around the image
-        if input_image.ndim == 3:
-            padding = ((min_padding[0], min_padding[1]), (min_padding[0], min_padding[1]), (0, 0))
-        else:
-            padding = ((min_padding[0], min_padding[1]), (min_padding[0], min_padding[1]))
-        image_padded = np.pad(input_image, padding, mode='reflect')
+        padding = ((min_padding[0], min_padding[1]), (min_padding[0], min_padding[1]))
+        height = input_image.shape[0] + sum(padding[0])
+        width = input_image.shape[1] + sum(padding[1])
 
         # Step 2: Calculate additional padding to ensure tiling fits properly
-        height, width = image_padded.shape[:2]
         pad_height_total = (bbox_size[0] - (height - bbox_size[0]) % stride[0]) % stride[0]
         pad_width_total = (bbox_size[1] - (width - bbox_size[1]) % stride[1]) % stride[1]
 
@@ -199,12 +199,9 @@ class TiledImage(np.ndarray):
         pad_left_extra = pad_width_total // 2
         pad_right_extra = pad_width_total - pad_left_extra
 
-        # Step 4: Apply the additional padding
-        if input_image.ndim == 3:
-            padding = ((pad_top_extra, pad_bottom_extra), (pad_left_extra, pad_right_extra), (0, 0))
-        else:
-            padding = ((pad_top_extra, pad_bottom_extra), (pad_left_extra, pad_right_extra))
-        image_padded = np.pad(image_padded, padding, mode='reflect')
+        # Step 4: Map every row and column of the padded image back to the input image
+        row_indices = TiledImage._reflect_indices(input_image.shape[0], padding[0], (pad_top_extra, pad_bottom_extra))
+        col_indices = TiledImage._reflect_indices(input_image.shape[1], padding[1], (pad_left_extra, pad_right_extra))
 
         # Total padding
         pad_top = min_padding[0] + pad_top_extra
@@ -212,38 +209,68 @@ class TiledImage(np.ndarray):
         pad_left = min_padding[1] + pad_left_extra
         pad_right = min_padding[1] + pad_right_extra
 
-        # Step 5: Extract tiles from the padded image
-        tiles, positions = TiledImage._extract_tiles(image_padded, bbox_size, stride)
+        # Step 5: Extract tiles from the virtually padded image
+        tiles, positions = TiledImage._extract_tiles(input_image, bbox_size, stride, row_indices, col_indices)
 
         return tiles, positions, pad_top, pad_bottom, pad_left, pad_right
 
     @staticmethod
-    def _extract_tiles(image, bbox_size, stride):
+    def _reflect_indices(length, *paddings):
+        """
+        Build the index map of a reflect-padded axis.
+
+        Parameters:
+        - length: Length of the unpadded axis.
+        - paddings: One or more (before, after) pad widths, applied in order as np.pad(mode='reflect') would be.
+
+        Returns:
+        - Numpy array giving, for each position along the padded axis, the index into the unpadded axis.
+        """
+        indices = np.arange(length)
+        for pad_width in paddings:
+            indices = np.pad(indices, pad_width, mode='reflect')
+        return indices
+
+    @staticmethod
+    def _extract_tiles(image, bbox_size, stride, row_indices=None, col_indices=None):
         """
         Extract overlapping tiles from the given image.
 
         Parameters:
-        - image: Numpy array of the padded image to extract tiles from.
+        - image: Numpy array of the image to extract tiles from.
         - bbox_size: Size of each tile (height, width).
         - stride: Stride for extracting tiles (distance_y, distance_x).
+        - row_indices: Optional index map of a padded image's rows into the image's rows.
+        - col_indices: Optional index map of a padded image's columns into the image's columns.
         
         Returns:
         - tiles: Numpy array of extracted tiles.
-        - positions: List of positions where each tile starts in the padded image.
+        - positions: (n_tiles, 2) int32 array of the (y, x) positions where each tile starts in the padded image.
         """
-        tiles = []
-        positions = []
-        height, width = image.shape[:2]
-        for y in range(0, height - bbox_size[0] + 1, stride[0]):
-            for x in range(0, width - bbox_size[1] + 1, stride[1]):
-                # Extract tile
-                if image.ndim == 3:
-                    tile = image[y:y+bbox_size[0], x:x+bbox_size[1], :]
-                else:
-                    tile = image[y:y+bbox_size[0], x:x+bbox_size[1]]
-                tiles.append(tile)
-                positions.append((y, x))
-        return np.array(tiles), positions
+        if row_indices is None:
+            row_indices = np.arange(image.shape[0])
+        if col_indices is None:
+            col_indices = np.arange(image.shape[1])
+        height, width = row_indices.size, col_indices.size
+
+        # Tile positions in row-major order, matching the tile order
+        ys, xs = np.mgrid[0:height - bbox_size[0] + 1:stride[0], 0:width - bbox_size[1] + 1:stride[1]]
+        n_y, n_x = ys.shape
+
+        tiles = np.empty((n_y, n_x, bbox_size[0], bbox_size[1]) + image.shape[2:], dtype=image.dtype)
+        for tile_row, y in enumerate(ys[:, 0]):
+            # Gather the band of (padded) rows covered by this row of tiles
+            band = image[row_indices[y:y + bbox_size[0]]][:, col_indices]
+
+            # Strided view of every tile window along the band, shape (height, n_x, [m_channels,] width),
+            # reordered to (n_x, height, width, [m_channels])
+            windows = np.lib.stride_tricks.sliding_window_view(band, bbox_size[1], axis=1)[:, ::stride[1]]
+            tiles[tile_row] = np.moveaxis(windows, (0, -1), (1, 2))
+
+        # Flatten the grid axes so tiles are indexed (n_tiles, height, width, [m_channels])
+        tiles = tiles.reshape((-1,) + tiles.shape[2:])
+        positions = np.stack((ys.ravel(), xs.ravel()), axis=1).astype(np.int32)
+        return tiles, positions
 
     def __array_finalize__(self, obj):
         if obj is None: return
@@ -283,6 +310,98 @@ class TiledImage(np.ndarray):
         obj.padded_shape = self.padded_shape
         return obj
 
+    def _tile_grid(self):
+        """
+        Find the regular grid the tile positions lie on.
+
+        Returns:
+        - Tuple (ys, xs) of the sorted tile start rows and columns if the positions form a regular
+          row-major grid with constant stride along each axis, otherwise None.
+        """
+        positions = np.asarray(self.positions).reshape(-1, 2)
+        ys = np.unique(positions[:, 0])
+        xs = np.unique(positions[:, 1])
+        grid_y, grid_x = np.meshgrid(ys, xs, indexing='ij')
+        steps_y = np.diff(ys)
+        steps_x = np.diff(xs)
+        is_grid = (
+            len(positions) > 0
+            and np.array_equal(positions[:, 0], grid_y.ravel())
+            and np.array_equal(positions[:, 1], grid_x.ravel())
+            and np.all(steps_y == steps_y[:1])
+            and np.all(steps_x == steps_x[:1])
+        )
+        return (ys, xs) if is_grid else None
+
+    def _iter_tile_groups(self, *accumulators):
+        """
+        Iterate over groups of mutually non-overlapping tiles, together with the matching
+        writeable windows of each accumulator, so a whole group can be accumulated at once.
+
+        Tiles on a regular grid are split into one group per offset within a tile, which is
+        only ceil(tile / stride) groups along each axis. Tiles at irregular positions are
+        yielded one at a time.
+
+        Parameters:
+        - accumulators: Arrays of the padded image shape (height, width) or (height, width, m_channels).
+
+        Yields:
+        - Tuple of (tiles, *windows), each shaped (n_y, n_x, height, width) or (n_y, n_x, height, width, m_channels).
+        """
+        tile_height, tile_width = self.bbox_size
+        tiles = self.view(np.ndarray)
+        grid = self._tile_grid()
+
+        if grid is None:
+            for tile, (y, x) in zip(tiles, self.positions):
+                windows = [accumulator[y:y+tile_height, x:x+tile_width][np.newaxis, np.newaxis] for accumulator in accumulators]
+                yield (tile[np.newaxis, np.newaxis], *windows)
+            return
+
+        ys, xs = grid
+        n_y, n_x = ys.size, xs.size
+        stride_y = ys[1] - ys[0] if n_y > 1 else tile_height
+        stride_x = xs[1] - xs[0] if n_x > 1 else tile_width
+        tiles = tiles.reshape((n_y, n_x) + tiles.shape[1:])
+
+        # Windows of each accumulator at every tile position on the grid
+        grid_windows = []
+        for accumulator in accumulators:
+            windows = np.lib.stride_tricks.sliding_window_view(accumulator, (tile_height, tile_width), axis=(0, 1), writeable=True)
+            if accumulator.ndim == 3:
+                windows = np.moveaxis(windows, 2, -1)
+            grid_windows.append(windows[ys[0]::stride_y, xs[0]::stride_x][:n_y, :n_x])
+
+        # Tiles at least a full tile apart never overlap, so every group can be written in place
+        step_y = -(-tile_height // stride_y)
+        step_x = -(-tile_width // stride_x)
+        for offset_y in range(min(step_y, n_y)):
+            for offset_x in range(min(step_x, n_x)):
+                group = np.s_[offset_y::step_y, offset_x::step_x]
+                yield (tiles[group], *(windows[group] for windows in grid_windows))
+
+    @staticmethod
+    def _last_covering_tile(starts, tile_length, image_length):
+        """
+        For every pixel along one axis of a tile grid, find the last tile covering it.
+
+        Parameters:
+        - starts: Sorted, evenly spaced tile start coordinates along the axis.
+        - tile_length: Length of each tile along the axis.
+        - image_length: Length of the padded image along the axis.
+
+        Returns:
+        - tile_index: Index into starts of the last tile covering each pixel.
+        - offset: Offset of each pixel within that tile.
+        - covered: Boolean array, False for pixels no tile covers.
+        """
+        coords = np.arange(image_length)
+        stride = starts[1] - starts[0] if starts.size > 1 else tile_length
+        tile_index = np.clip((coords - starts[0]) // stride, 0, starts.size - 1)
+        offset = coords - starts[tile_index]
+        covered = (offset >= 0) & (offset < tile_length)
+        return tile_index, np.where(covered, offset, 0), covered
+
     def reform_image_overwrite(self, crop=True):
         """
         Reform the image using overwriting reconstruction without any averaging or other operations.
@@ -333,25 +452,13 @@ class TiledImage(np.ndarray):
             reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1], self.shape[-1]), dtype=np.float32)
             weight_matrix = np.zeros((self.padded_shape[0], self.padded_shape[1], 1), dtype=np.float32)
 
-        # Iterate through each tile and add it to the reconstructed image with appropriate weights
-        for tile, (y, x) in zip(self, self.positions):
-            tile_height, tile_width = tile.shape[0:2]
-            
-            if is_single_channel:
-                reconstructed_image[y:y+tile_height, x:x+tile_width] += tile  # Single channel, no need to squeeze
-                weight_matrix[y:y+tile_height, x:x+tile_width] += 1
-            else:
-                reconstructed_image[y:y+tile_height, x:x+tile_width, :] += tile
-                weight_matrix[y:y+tile_height, x:x+tile_width, :] += 1
+        # Add each group of non-overlapping tiles to the reconstructed image with appropriate weights
+        for tiles, image_windows, weight_windows in self._iter_tile_groups(reconstructed_image, weight_matrix):
+            image_windows += tiles
+            weight_windows += 1
 
-        # Avoid division by zero
-        weight_matrix[weight_matrix == 0] = 1
-
-        # Average the overlapping areas
-        if is_single_channel:
-            reconstructed_image /= weight_matrix
-        else:
-            reconstructed_image /= weight_matrix
+        # Average the overlapping areas, leaving uncovered pixels (zero weight) at 0
+        np.divide(reconstructed_image, weight_matrix, out=reconstructed_image, where=weight_matrix != 0)
 
         # Crop the padded area to return the original image size if crop is True
         if crop:
@@ -369,20 +476,31 @@ class TiledImage(np.ndarray):
         # Determine if the image is single-channel or multi-channel based on the tile shape
         is_single_channel = self.shape[-1] == 1 if self.ndim == 4 else True
 
-        # Initialize the reconstructed image
-        if is_single_channel:
-            reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1]), dtype=self.dtype)
+        grid = self._tile_grid()
+        if grid is not None:
+            # On a regular grid the last tile written to each pixel is the last tile covering
+            # both its row and its column, so gather every pixel from that tile directly
+            ys, xs = grid
+            tiles = self.view(np.ndarray).reshape((ys.size, xs.size) + self.shape[1:])
+            tile_y, offset_y, covered_y = self._last_covering_tile(ys, self.bbox_size[0], self.padded_shape[0])
+            tile_x, offset_x, covered_x = self._last_covering_tile(xs, self.bbox_size[1], self.padded_shape[1])
+            reconstructed_image = tiles[tile_y[:, np.newaxis], tile_x[np.newaxis, :], offset_y[:, np.newaxis], offset_x[np.newaxis, :]]
+            reconstructed_image[~(covered_y[:, np.newaxis] & covered_x[np.newaxis, :])] = 0
         else:
-            reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1], self.shape[-1]), dtype=self.dtype)
-
-        # Iterate through each tile and overwrite it in the reconstructed image
-        for tile, (y, x) in zip(self, self.positions):
-            tile_height, tile_width = tile.shape[0:2]
-            
+            # Initialize the reconstructed image
             if is_single_channel:
-                reconstructed_image[y:y+tile_height, x:x+tile_width] = tile  # Overwrite
+                reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1]), dtype=self.dtype)
             else:
-                reconstructed_image[y:y+tile_height, x:x+tile_width, :] = tile
+                reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1], self.shape[-1]), dtype=self.dtype)
+
+            # Iterate through each tile and overwrite it in the reconstructed image
+            for tile, (y, x) in zip(self, self.positions):
+                tile_height, tile_width = tile.shape[0:2]
+
+                if is_single_channel:
+                    reconstructed_image[y:y+tile_height, x:x+tile_width] = tile  # Overwrite
+                else:
+                    reconstructed_image[y:y+tile_height, x:x+tile_width, :] = tile
 
         # Crop the padded area to return the original image size if crop is True
         if crop:
@@ -413,37 +531,34 @@ class TiledImage(np.ndarray):
             reconstructed_image = np.zeros((self.padded_shape[0], self.padded_shape[1], self.shape[-1]), dtype=np.float32)
             weight_matrix = np.zeros((self.padded_shape[0], self.padded_shape[1], 1), dtype=np.float32)
 
-        # Create a Gaussian weight mask for each tile
+        # Create the Gaussian weights for each tile. The 2D Gaussian is separable, so keep
+        # one weight vector per axis and only build the full 2D mask for the weight matrix
         tile_height, tile_width = self.shape[1:3]
-        gaussian_weights = np.ones((tile_height, tile_width), dtype=np.float32)
-        gaussian_weights = gaussian_filter(gaussian_weights, sigma=sigma)
-
-        # Normalize the weights to make sure the sum is 1 within each tile
-        gaussian_weights /= gaussian_weights.max()
-
-        # If multi-channel, expand the Gaussian weights to match the number of channels
-        if not is_single_channel:
-            gaussian_weights = np.expand_dims(gaussian_weights, axis=-1)
-
-        # Iterate through each tile and add it to the reconstructed image with Gaussian weights
-        for tile, (y, x) in zip(self, self.positions):
-            tile_height, tile_width = tile.shape[0:2]
-            
-            if is_single_channel:
-                reconstructed_image[y:y+tile_height, x:x+tile_width] += tile * gaussian_weights
-                weight_matrix[y:y+tile_height, x:x+tile_width] += gaussian_weights
-            else:
-                reconstructed_image[y:y+tile_height, x:x+tile_width, :] += tile * gaussian_weights
-                weight_matrix[y:y+tile_height, x:x+tile_width, :] += gaussian_weights
+        weights_y = gaussian_filter1d(np.ones(tile_height, dtype=np.float32), sigma=sigma)
+        weights_x = gaussian_filter1d(np.ones(tile_width, dtype=np.float32), sigma=sigma)
 
-        # Avoid division by zero
-        weight_matrix[weight_matrix == 0] = 1
+        # Normalize the weights so the peak weight within each tile is 1
+        weights_y /= weights_y.max()
+        weights_x /= weights_x.max()
 
-        # Average the overlapping areas with the weighted sum
+        # Shape the weight vectors to broadcast against the tile rows and columns
         if is_single_channel:
-            reconstructed_image /= weight_matrix
+            weights_y = weights_y[:, np.newaxis]
+            weights_x = weights_x[np.newaxis, :]
         else:
-            reconstructed_image /= weight_matrix
+            weights_y = weights_y[:, np.newaxis, np.newaxis]
+            weights_x = weights_x[np.newaxis, :, np.newaxis]
+        gaussian_weights = weights_y * weights_x
+
+        # Add each group of non-overlapping tiles to the reconstructed image with Gaussian weights
+        for tiles, image_windows, weight_windows in self._iter_tile_groups(reconstructed_image, weight_matrix):
+            weighted_tiles = tiles * weights_y
+            weighted_tiles *= weights_x
+            image_windows += weighted_tiles
+            weight_windows += gaussian_weights
+
+        # Average the overlapping areas with the weighted sum, leaving uncovered pixels (zero weight) at 0
+        np.divide(reconstructed_image, weight_matrix, out=reconstructed_image, where=weight_matrix != 0)
 
         # Crop the padded area to return the original image size if crop is True
         if crop:
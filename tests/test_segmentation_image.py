@@ -0,0 +1,150 @@
+import gc
+import weakref
+
+import cv2
+import numpy as np
+import pytest
+from scipy.ndimage import binary_erosion
+from skimage import morphology
+from skimage.morphology import disk
+from skimage.segmentation import expand_labels
+
+from segflow import SegmentationImage
+from segflow.full_image import segmentation_image
+from segflow.full_image.segmentation_image import (
+    binary_dilation_fft, binary_dilation_packed, binary_erosion_fft, binary_erosion_packed, cached_ellipse,
+    dilate_labels, erode_labels
+)
+
+
+def make_segmentation_image():
+    return SegmentationImage(np.array([[0, 1, 1], [3, 3, 0], [0, 0, 2]], dtype=np.int32))
+
+
+def test_views_share_caches_and_invalidation():
+    image = make_segmentation_image()
+    centroids = image.centroids
+
+    view = image.view(SegmentationImage)
+    assert view.centroids is centroids
+
+    view[2, 2] = 0
+    assert image.labels.tolist() == [0, 1, 3]
+
+
+def test_copies_and_ufunc_results_start_with_empty_caches():
+    image = make_segmentation_image()
+    image.labels
+
+    copied = image.copy()
+    copied[0, 0] = 5
+    assert copied.labels.tolist() == [0, 1, 2, 3, 5]
+    assert image.labels.tolist() == [0, 1, 2, 3]
+
+    shifted = image + 1
+    del image
+    result = shifted - 5
+    assert result._labels_cache is None
+    assert shifted.labels.tolist() == [1, 2, 3, 4]
+
+
+def test_fft_morphology_matches_opencv():
+    rng = np.random.default_rng(0)
+    image = (rng.random((300, 280)) < 0.002).astype(np.uint8) * 255
+    selem = cached_ellipse(60)
+
+    assert np.array_equal(binary_dilation_fft(image, 60), cv2.dilate(image, selem))
+    assert np.array_equal(binary_erosion_fft(~image, 60, workers=2), cv2.erode(~image, selem))
+
+
+@pytest.mark.parametrize("float32_max_count", [segmentation_image.FFT_FLOAT32_MAX_COUNT, 0])
+def test_fft_morphology_matches_skimage(monkeypatch, float32_max_count):
+    # A maximum count of 0 runs the float64 path used for very large structuring elements
+    monkeypatch.setattr(segmentation_image, "FFT_FLOAT32_MAX_COUNT", float32_max_count)
+    rng = np.random.default_rng(1)
+    image = rng.random((70, 90)) < 0.03
+    for radius in (2, 6, 11):
+        footprint = cached_ellipse(radius).astype(bool)
+        expected_dilation = morphology.dilation(image, footprint, mode='constant', cval=False)
+        expected_erosion = morphology.erosion(~image, footprint, mode='constant', cval=True)
+        assert np.array_equal(binary_dilation_fft(image.astype(np.uint8), radius), expected_dilation)
+        assert np.array_equal(binary_erosion_fft((~image).astype(np.uint8), radius), expected_erosion)
+
+
+def test_dilate_labels_matches_expand_labels():
+    rng = np.random.default_rng(0)
+    for radius in (1, 3, 7.5, 18):
+        labels = rng.integers(1, 20, (120, 100), dtype=np.int32)
+        labels[rng.random(labels.shape) < 0.995] = 0
+        assert np.array_equal(dilate_labels(labels, radius), expand_labels(labels, radius))
+
+
+def test_dropped_image_with_caches_is_freed_without_gc():
+    gc.disable()
+    try:
+        image = make_segmentation_image()
+        image.labels
+        image.centroids
+        copied = image.copy()
+        copied.labels
+        references = [weakref.ref(image), weakref.ref(copied)]
+        del image, copied
+        assert all(reference() is None for reference in references)
+    finally:
+        gc.enable()
+
+
+def test_labels_and_areas_with_large_sparse_label_ids():
+    image = SegmentationImage(np.array([[0, 2**31 - 1], [2**31 - 1, 5]], dtype=np.int32))
+    assert image.labels.tolist() == [0, 5, 2**31 - 1]
+
+    image = SegmentationImage(np.array([[0, 10**6, 10**6], [7, 7, 7]], dtype=np.int32))
+    assert dict(image.area.items()) == {7: 3, 10**6: 2}
+
+
+def test_apply_binary_mask_warns_on_non_binary_mask():
+    image = make_segmentation_image()
+    mask = SegmentationImage(np.array([[0, 2, 0], [0, 0, 0], [0, 0, 2]], dtype=np.int32))
+
+    with pytest.warns(UserWarning, match="other than 0 and 1"):
+        masked = image.apply_binary_mask(mask, 'any_in')
+    assert np.asarray(masked).tolist() == [[0, 1, 1], [0, 0, 0], [0, 0, 2]]
+
+
+def make_label_image(seed=0, shape=(60, 50)):
+    """
+    Labels touching each other and the image border: a random label image expanded into the background.
+    """
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(1, 30, shape, dtype=np.int32)
+    labels[rng.random(shape) < 0.98] = 0
+    return expand_labels(labels, 6)
+
+
+def test_erode_labels_matches_per_label_erosion():
+    for seed in range(3):
+        labels = make_label_image(seed)
+        for radius in (1, 2, 4):
+            opencv_reference = np.zeros_like(labels)
+            disk_reference = np.zeros_like(labels)
+            for label in np.unique(labels[labels != 0]):
+                mask = (labels == label).astype(np.uint8)
+                opencv_reference[cv2.erode(mask, cached_ellipse(radius)) > 0] = label
+                disk_reference[binary_erosion(mask, structure=disk(radius))] = label
+
+            assert np.array_equal(erode_labels(labels, radius), opencv_reference)
+            assert np.array_equal(erode_labels(labels, radius, footprint=disk(radius), mode='constant'), disk_reference)
+
+
+def test_packed_morphology_matches_skimage():
+    rng = np.random.default_rng(0)
+    # One word per row and rows across word boundaries, with shifts within a word and by whole words
+    for shape in ((40, 64), (30, 150)):
+        image = rng.random(shape) < 0.05
+        for radius in (1, 5, 70):
+            footprint = disk(radius)
+            # Outside the image counts as False for dilation and True for erosion
+            expected_dilation = morphology.dilation(image, footprint, mode='constant', cval=False)
+            expected_erosion = morphology.erosion(~image, footprint, mode='constant', cval=True)
+            assert np.array_equal(binary_dilation_packed(image, footprint), expected_dilation)
+            assert np.array_equal(binary_erosion_packed(~image, footprint), expected_erosion)
@@ -0,0 +1,95 @@
+import numpy as np
+from scipy.ndimage import binary_fill_holes
+from skimage.measure import label
+
+from segflow import SegmentationImage, SegmentationPatchTiledImage
+from segflow.tiled_image.segmentation_patch_tiled_image import fill_holes
+
+
+def make_patch_tiled_image():
+    """
+    Build patches from an image with a few large cells and a few single-pixel cells.
+    """
+    image = np.zeros((64, 64), dtype=np.int32)
+    image[4:16, 4:16] = 1
+    image[4:16, 40:52] = 2
+    image[40:52, 4:16] = 3
+    image[20, 20] = 4
+    image[44, 44] = 5
+    return SegmentationPatchTiledImage.from_image(SegmentationImage(image), (16, 16))
+
+
+def test_drop_labels_accepts_set_from_find_patches_with_small_labels():
+    patches = make_patch_tiled_image()
+    small_labels = patches.find_patches_with_small_labels(min_area_px=2)
+    assert isinstance(small_labels, set)
+    assert small_labels == {4, 5}
+
+    dropped = patches.drop_labels(small_labels)
+
+    # The patches centered on the small labels are removed
+    remaining_labels = [description['region_label'] for description in dropped.patch_descriptions]
+    assert remaining_labels == [1, 2, 3]
+    assert dropped.shape[0] == 3
+
+    # The small labels are zeroed out of the remaining patches
+    assert not np.isin(np.asarray(dropped), [4, 5]).any()
+    assert np.isin(np.asarray(patches), [4, 5]).any()
+
+
+def test_combine_tiles_pastes_nonzero_pixels_in_order():
+    patches = make_patch_tiled_image()
+    patches[0, 0, 0] = 7
+
+    expected = np.zeros(patches.original_shape, dtype=patches.dtype)
+    for patch, description in zip(np.asarray(patches), patches.patch_descriptions):
+        y, x = description['bbox_position']
+        region = expected[y:y + patch.shape[0], x:x + patch.shape[1]]
+        region[patch > 0] = patch[patch > 0]
+
+    assert np.array_equal(np.asarray(patches.combine_tiles()), expected)
+
+
+def remove_disjointed_pixels_reference(patches):
+    """
+    Keep the largest connected component of every label split into several, label by label and patch by patch.
+    """
+    total_pixels_removed = 0
+    for patch in patches:
+        for label_value in np.unique(patch[patch > 0]):
+            labeled_components, num_components = label(patch == label_value, return_num=True, connectivity=2)
+            if num_components > 1:
+                component_sizes = np.bincount(labeled_components.ravel())[1:]
+                largest_component_label = np.argmax(component_sizes) + 1
+                total_pixels_removed += np.sum(labeled_components != largest_component_label)
+                patch[labeled_components != largest_component_label] = 0
+    return total_pixels_removed
+
+
+def test_remove_disjointed_pixels_matches_per_label_reference(capsys):
+    patches = make_patch_tiled_image()
+    rng = np.random.default_rng(0)
+    stack = patches.view(np.ndarray)
+    stack[1:] = rng.choice(np.array([0, 0, 0, 1, 2, 5], dtype=stack.dtype), size=stack[1:].shape)
+    expected = stack.copy()
+    pixels_removed = remove_disjointed_pixels_reference(expected)
+
+    patches.remove_disjointed_pixels(num_workers=2)
+    assert np.array_equal(stack, expected)
+    assert f"Total pixels removed: {pixels_removed}" in capsys.readouterr().err
+
+
+def test_fill_holes_matches_binary_fill_holes():
+    rng = np.random.default_rng(0)
+    # Random masks of several densities, including single rows and columns, touching the border everywhere
+    for shape in ((40, 55), (1, 30), (30, 1)):
+        for density in (0.3, 0.5, 0.7):
+            mask = rng.random(shape) < density
+            assert np.array_equal(fill_holes(mask), binary_fill_holes(mask))
+
+    # A ring fills its hole, but not once it is cut open onto the image border
+    mask = np.zeros((9, 9), dtype=bool)
+    mask[2:7, 2:7] = True
+    mask[3:6, 3:6] = False
+    assert np.array_equal(fill_holes(mask), binary_fill_holes(mask))
+    assert not fill_holes(mask[:, 4:])[4, 0]
@@ -0,0 +1,78 @@
+import numpy as np
+from scipy.ndimage import gaussian_filter
+from skimage.measure import label
+
+from segflow.tiled_image import SegmentationTiledImage
+
+
+def make_segmentation_tiled_image(seed=0):
+    """
+    Tile a blob segmentation, then relabel every tile independently and drop some of its pixels,
+    so the same cell gets different labels and shapes in overlapping tiles.
+    """
+    rng = np.random.default_rng(seed)
+    segmentation = label(gaussian_filter(rng.random((72, 72)), 2) > 0.52).astype(np.int32)
+    tiled_image = SegmentationTiledImage.from_image(segmentation, (32, 32), (16, 16), (4, 4))
+
+    tiles = tiled_image.view(np.ndarray)
+    for tile in tiles:
+        tile[rng.random(tile.shape) < 0.1] = 0
+        tile[:] = label(tile > 0)
+        tile[tile > 0] += rng.integers(0, 50)
+    return tiled_image
+
+
+def combine_tiles_reference(tiled_image, iou_threshold):
+    """
+    Merge the tiles label by label, with one boolean mask per label and overlapping label.
+    """
+    full_segmentation_mask = np.zeros(tiled_image.padded_shape[:2], dtype=np.int32)
+    max_global_label = 0
+    tile_height, tile_width = tiled_image.bbox_size
+    for tile_segmentation, (y, x) in zip(tiled_image.view(np.ndarray), tiled_image.positions):
+        full_mask_region = full_segmentation_mask[y:y + tile_height, x:x + tile_width]
+        for tile_label in np.unique(tile_segmentation[tile_segmentation != 0]):
+            tile_mask = tile_segmentation == tile_label
+            overlapping_labels = np.unique(full_mask_region[tile_mask & (full_mask_region > 0)])
+
+            best_iou, best_label = 0.0, None
+            for overlap_label in overlapping_labels:
+                region_mask = full_mask_region == overlap_label
+                iou = (tile_mask & region_mask).sum() / (tile_mask | region_mask).sum()
+                if iou > best_iou:
+                    best_iou, best_label = iou, overlap_label
+
+            if best_label is not None and best_iou >= iou_threshold:
+                full_mask_region[tile_mask] = best_label
+            else:
+                max_global_label += 1
+                full_mask_region[tile_mask] = max_global_label
+
+    full_segmentation_mask = label(full_segmentation_mask)
+    return full_segmentation_mask[
+        tiled_image.pad_top:tiled_image.padded_shape[0] - tiled_image.pad_bottom,
+        tiled_image.pad_left:tiled_image.padded_shape[1] - tiled_image.pad_right
+    ]
+
+
+def test_combine_tiles_matches_per_label_iou_reference():
+    for seed in range(4):
+        tiled_image = make_segmentation_tiled_image(seed)
+        for iou_threshold in (0.3, 0.5, 0.9):
+            expected = combine_tiles_reference(tiled_image, iou_threshold)
+            combined = tiled_image.combine_tiles(iou_threshold=iou_threshold)
+            assert np.array_equal(np.asarray(combined), expected)
+
+
+def test_combine_tiles_keeps_labels_of_abutting_tiles_apart():
+    # Cells cut by the borders of non-overlapping tiles, with labels restarting at 1 in every tile,
+    # only stay separate pieces if every tile label gets its own global label
+    rng = np.random.default_rng(0)
+    segmentation = label(gaussian_filter(rng.random((64, 64)), 3) > 0.5).astype(np.int32)
+    tiled_image = SegmentationTiledImage.from_image(segmentation, (16, 16), (16, 16), (0, 0))
+    for tile in tiled_image.view(np.ndarray):
+        tile[:] = label(tile > 0)
+
+    expected = combine_tiles_reference(tiled_image, iou_threshold=0.5)
+    assert np.array_equal(np.asarray(tiled_image.combine_tiles()), expected)
+    assert np.unique(expected).size > np.unique(segmentation).size
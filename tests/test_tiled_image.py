@@ -0,0 +1,64 @@
+import numpy as np
+from scipy.ndimage import gaussian_filter
+
+from segflow.tiled_image import TiledImage
+
+
+def make_tiled_image(shape=(70, 70), bbox_size=(24, 24), stride=(10, 10)):
+    image = np.random.default_rng(0).random(shape).astype(np.float32)
+    return TiledImage.from_image(image, bbox_size, stride, (4, 4))
+
+
+def combine_tiles_reference(tiled_image, tile_weights):
+    """
+    Accumulate every tile one at a time with the given per-pixel weights and divide by the summed weights.
+    """
+    reconstructed_image = np.zeros(tiled_image.padded_shape[:2] + tiled_image.shape[3:], dtype=np.float32)
+    weight_matrix = np.zeros(tiled_image.padded_shape[:2] + tiled_image.shape[3:], dtype=np.float32)
+    tile_height, tile_width = tiled_image.bbox_size
+    for tile, (y, x) in zip(np.asarray(tiled_image), tiled_image.positions):
+        reconstructed_image[y:y + tile_height, x:x + tile_width] += tile * tile_weights
+        weight_matrix[y:y + tile_height, x:x + tile_width] += tile_weights
+    weight_matrix[weight_matrix == 0] = 1
+    reconstructed_image /= weight_matrix
+    return reconstructed_image[
+        tiled_image.pad_top:tiled_image.padded_shape[0] - tiled_image.pad_bottom,
+        tiled_image.pad_left:tiled_image.padded_shape[1] - tiled_image.pad_right
+    ]
+
+
+def gaussian_tile_weights(tiled_image, sigma=10):
+    weights = gaussian_filter(np.ones(tiled_image.bbox_size, dtype=np.float32), sigma=sigma)
+    weights /= weights.max()
+    return weights if tiled_image.ndim == 3 else weights[..., np.newaxis]
+
+
+def test_gaussian_blending_matches_per_tile_reference():
+    tiled_image = make_tiled_image()
+    expected = combine_tiles_reference(tiled_image, gaussian_tile_weights(tiled_image))
+    combined = tiled_image.combine_tiles(method="gaussian_blending")
+    np.testing.assert_allclose(np.asarray(combined), expected, rtol=1e-5, atol=1e-6)
+
+    # combine_tiles returns single-channel images, so multi-channel tiles are combined directly
+    tiled_image = make_tiled_image((70, 70, 3))
+    expected = combine_tiles_reference(tiled_image, gaussian_tile_weights(tiled_image))
+    combined = tiled_image._combine_tiles_gaussian_blending(crop=True)
+    np.testing.assert_allclose(combined, expected, rtol=1e-5, atol=1e-6)
+
+
+def test_average_matches_per_tile_reference():
+    tiled_image = make_tiled_image()
+    expected = combine_tiles_reference(tiled_image, np.float32(1))
+    np.testing.assert_allclose(np.asarray(tiled_image.combine_tiles(method="average")), expected, rtol=1e-6)
+
+    # Tiles out of row-major order are accumulated one at a time instead of in grid groups
+    shuffled = TiledImage.from_tiled_array(
+        np.asarray(tiled_image)[::-1], tiled_image.positions[::-1], tiled_image.original_shape,
+        tiled_image.pad_top, tiled_image.pad_bottom, tiled_image.pad_left, tiled_image.pad_right
+    )
+    assert shuffled._tile_grid() is None
+    np.testing.assert_allclose(np.asarray(shuffled.combine_tiles(method="average")), expected, rtol=1e-6)
+
+    tiled_image = make_tiled_image((70, 70, 3))
+    expected = combine_tiles_reference(tiled_image, np.float32(1))
+    np.testing.assert_allclose(tiled_image._combine_tiles_average(crop=True), expected, rtol=1e-6)